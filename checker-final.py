@@ -1,4 +1,630 @@
 from tkinter import *
+import queue
+import threading
+import time
+
+import game_search
+from game_search import (EXACT, LOWER_BOUND, UPPER_BOUND, SearchTimeout,
+                         TranspositionTable, zobrist_keys)
+
+# the 32 dark squares are numbered 0-31, 4 to a row:
+#   the square at (row,column) is number 4 * row + column // 2
+SQUARE_COORDS = tuple((square // 4, 2 * (square % 4) + (square // 4 + 1) % 2)
+                      for square in range(32))
+# what a square can hold
+EMPTY = 0
+MAN = (1, 2)  # normal piece of player 0, player 1
+KING = (3, 4)  # king of player 0, player 1
+# search values, in points for the player to move
+MAN_VALUE = 100
+KING_VALUE = 150
+ADVANCE_VALUE = 3  # bonus per row a normal piece has moved forward
+WIN_VALUE = 100000  # value of a won game
+# a win found in an endgame database is worth this plus the usual
+#   evaluation, so the search still heads for simpler wins
+DATABASE_WIN_VALUE = 50000
+# endgame database results, for the player to move
+DRAW = 0
+WIN = 1
+LOSS = 2
+SEARCH_DEPTH = 4  # how far ahead to look when there is no time limit
+# Zobrist keys for each (piece, square) and for player 1 to move
+#   (EMPTY squares have key 0, so they don't change the hash)
+PIECE_KEYS, PLAYER_KEY = zobrist_keys(len(MAN + KING), 32)
+PIECE_KEYS = ((0,) * 32,) + PIECE_KEYS
+
+
+def square_number(row, col):
+    '''square_number(row,col) -> int or None
+    returns the number of the dark square at (row,col)
+      (None if (row,col) is off the board or a light square)'''
+    if 0 <= row < 8 and 0 <= col < 8 and (row + col) % 2 == 1:
+        return 4 * row + col // 2
+    return None
+
+
+# the four diagonal directions as (rowStep,colStep)
+#   0 and 1 are forward for player 0, 2 and 3 are forward for player 1
+DIRECTIONS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+# NEIGHBORS[square][direction] is the next square that way (None if off the board)
+NEIGHBORS = tuple(tuple(square_number(row + rowStep, col + colStep)
+                        for (rowStep, colStep) in DIRECTIONS)
+                  for (row, col) in SQUARE_COORDS)
+# JUMPS[square][direction] is (jumped square,landing square) (None if off the board)
+JUMPS = tuple(tuple(None if square_number(row + 2 * rowStep, col + 2 * colStep) is None
+                    else (square_number(row + rowStep, col + colStep),
+                          square_number(row + 2 * rowStep, col + 2 * colStep))
+                    for (rowStep, colStep) in DIRECTIONS)
+              for (row, col) in SQUARE_COORDS)
+# directions each piece can move in, indexed by piece
+PIECE_DIRECTIONS = ((), (0, 1), (2, 3), (0, 1, 2, 3), (0, 1, 2, 3))
+# squares where each player's normal pieces are crowned
+CROWN_SQUARES = (frozenset(range(28, 32)), frozenset(range(4)))
+
+
+def zobrist_hash(squares, turn):
+    '''zobrist_hash(squares,turn) -> int
+    returns the Zobrist hash of the pieces in squares with player turn to move'''
+    hashKey = PLAYER_KEY if turn == 1 else 0
+    for square in range(32):
+        hashKey ^= PIECE_KEYS[squares[square]][square]
+    return hashKey
+
+
+def piece_player(piece):
+    '''piece_player(piece) -> int or None
+    returns the player a piece belongs to (None for EMPTY)'''
+    if piece == EMPTY:
+        return None
+    return (piece - 1) % 2
+
+
+class CheckersPosition:
+    '''represents a position in checkers without any display
+    stores the pieces on the 32 dark squares and whose turn it is'''
+
+    def __init__(self):
+        '''CheckersPosition() -> CheckersPosition
+        creates the starting position, player 0 to move'''
+        self.squares = bytearray(32)  # piece on each dark square
+        for square in range(12):  # player 0 fills rows 0-2
+            self.squares[square] = MAN[0]
+        for square in range(20, 32):  # player 1 fills rows 5-7
+            self.squares[square] = MAN[1]
+        self.turn = 0  # who goes first
+        self.hashKey = zobrist_hash(self.squares, self.turn)
+        # (move, captured pieces, moving piece, hash) for each make_move
+        self.undoStack = []
+        self.nodes = 0  # positions visited by the search
+        self.searchDepth = 0  # depth of the last completed search
+        self.table = None  # TranspositionTable of the last search
+        # move ordering: history scores for quiet (from,to) moves that
+        #   caused cutoffs, and up to 2 killer moves for each ply
+        self.history = {}
+        self.killers = {}
+        # checkers_endgame.EndgameDatabase with exact results for positions
+        #   with few pieces (None to search them like any other position)
+        self.endgameDatabase = None
+        # searches stop (as if out of time) once this threading.Event is set
+        self.stopEvent = None
+
+    def set_squares(self, squares, turn=0):
+        '''CheckersPosition.set_squares(squares[,turn])
+        sets up the position with the pieces in squares (32 pieces, by
+          square number) and player turn to move'''
+        self.squares = bytearray(squares)
+        self.turn = turn
+        self.hashKey = zobrist_hash(self.squares, turn)
+        self.undoStack = []
+
+    def snapshot(self):
+        '''CheckersPosition.snapshot() -> bytes
+        returns the position as 33 immutable bytes: the piece on each
+          square, then the player to move'''
+        return bytes(self.squares) + bytes((self.turn,))
+
+    def restore(self, snapshot):
+        '''CheckersPosition.restore(snapshot)
+        sets up the position saved by snapshot'''
+        self.set_squares(snapshot[:32], snapshot[32])
+
+    def set_piece(self, square, piece):
+        '''CheckersPosition.set_piece(square,piece)
+        puts piece (or EMPTY) on square number square'''
+        self.hashKey ^= PIECE_KEYS[self.squares[square]][square] ^ PIECE_KEYS[piece][square]
+        self.squares[square] = piece
+
+    def get_piece(self, row, col):
+        '''CheckersPosition.get_piece(row,col) -> int
+        returns the piece on (row,col): EMPTY or a MAN or KING code'''
+        return self.squares[4 * row + col // 2]
+
+    def get_player(self, row, col):
+        '''CheckersPosition.get_player(row,col) -> int/None
+        returns the number of the player whose piece is on (row,col)
+        (None if the square is empty)'''
+        return piece_player(self.squares[4 * row + col // 2])
+
+    def is_king(self, row, col):
+        '''CheckersPosition.is_king(row,col) -> bool
+        returns True if a king is on (row,col), False otherwise'''
+        return self.squares[4 * row + col // 2] in KING
+
+    def is_empty(self, row, col):
+        '''CheckersPosition.is_empty(row,col) -> bool
+        returns True if (row,col) is empty, False if it contains a piece'''
+        return self.squares[4 * row + col // 2] == EMPTY
+
+    def square_can_jump(self, square):
+        '''CheckersPosition.square_can_jump(square) -> bool
+        returns True if the piece on square number square can jump, False if not'''
+        piece = self.squares[square]
+        opponent = 1 - piece_player(piece)
+        for direction in PIECE_DIRECTIONS[piece]:
+            jump = JUMPS[square][direction]
+            if jump is not None and self.squares[jump[1]] == EMPTY and \
+                    piece_player(self.squares[jump[0]]) == opponent:
+                return True
+        return False
+
+    def square_can_move(self, square):
+        '''CheckersPosition.square_can_move(square) -> bool
+        returns True if the piece on square number square can make a
+          normal move, False if not'''
+        for direction in PIECE_DIRECTIONS[self.squares[square]]:
+            neighbor = NEIGHBORS[square][direction]
+            if neighbor is not None and self.squares[neighbor] == EMPTY:
+                return True
+        return False
+
+    def piece_can_jump(self, row, col):
+        '''CheckersPosition.piece_can_jump(row,col) -> bool
+        returns True if the piece at (row,col) can jump, False if not'''
+        return self.square_can_jump(4 * row + col // 2)
+
+    def piece_can_move(self, row, col):
+        '''CheckersPosition.piece_can_move(row,col) -> bool
+        returns True if the piece at (row,col) can make a normal move, False if not'''
+        return self.square_can_move(4 * row + col // 2)
+
+    def player_can_jump(self, player=None):
+        '''CheckersPosition.player_can_jump([player]) -> bool
+        returns True if any of player's pieces can jump, False if not
+          (player defaults to the player to move)'''
+        if player is None:
+            player = self.turn
+        for square in range(32):
+            if piece_player(self.squares[square]) == player and self.square_can_jump(square):
+                return True
+        return False
+
+    def player_can_move(self, player=None):
+        '''CheckersPosition.player_can_move([player]) -> bool
+        returns True if any of player's pieces can make a normal move, False if not
+          (player defaults to the player to move)'''
+        if player is None:
+            player = self.turn
+        for square in range(32):
+            if piece_player(self.squares[square]) == player and self.square_can_move(square):
+                return True
+        return False
+
+    def move(self, oldr, oldc, newr, newc):
+        '''CheckersPosition.move(oldr,oldc,newr,newc)
+        moves the piece that's on square (oldr,oldc) to square (newr,newc)
+        a normal piece that reaches the far row becomes a king'''
+        piece = self.squares[4 * oldr + oldc // 2]
+        player = piece_player(piece)
+        if newr == 7 * (1 - player):  # made to last row, make it a king
+            piece = KING[player]
+        self.set_piece(4 * oldr + oldc // 2, EMPTY)
+        self.set_piece(4 * newr + newc // 2, piece)
+
+    def jump(self, oldr, oldc, newr, newc):
+        '''CheckersPosition.jump(oldr,oldc,newr,newc)
+        jumps the piece that's on square (oldr,oldc) to square (newr,newc)
+        and removes the piece in between that got jumped over'''
+        self.move(oldr, oldc, newr, newc)
+        self.set_piece(square_number((oldr + newr) // 2, (oldc + newc) // 2), EMPTY)
+
+    def next_turn(self):
+        '''CheckersPosition.next_turn()
+        goes to the other player's turn'''
+        self.turn = 1 - self.turn
+        self.hashKey ^= PLAYER_KEY
+
+    def jump_paths(self, path, captured, piece):
+        '''CheckersPosition.jump_paths(path,captured,piece) -> generator
+        yields (path,captured) for every complete jump that continues path
+          path is the tuple of squares piece has visited so far,
+          captured the tuple of squares it has jumped over
+        jumped pieces count as removed straight away, so they can't be
+          jumped twice, and the jump ends when the piece is crowned'''
+        square = path[-1]
+        opponent = 1 - piece_player(piece)
+        extended = False
+        for direction in PIECE_DIRECTIONS[piece]:
+            jump = JUMPS[square][direction]
+            if jump is None:
+                continue
+            jumped, landing = jump
+            if piece_player(self.squares[jumped]) != opponent or jumped in captured:
+                continue
+            if self.squares[landing] != EMPTY and landing != path[0] and \
+                    landing not in captured:
+                continue
+            extended = True
+            if piece in MAN and landing in CROWN_SQUARES[piece_player(piece)]:
+                yield path + (landing,), captured + (jumped,)  # crowned, turn over
+            else:
+                yield from self.jump_paths(path + (landing,), captured + (jumped,), piece)
+        if not extended and len(captured) > 0:
+            yield path, captured
+
+    def generate_moves(self):
+        '''CheckersPosition.generate_moves() -> generator
+        yields every legal move for the player to move as (path,captured):
+          path is the tuple of square numbers the piece visits, including
+          every landing square of a multi-jump, and captured is the tuple
+          of squares it jumps over (empty for a normal move)
+        jumps are compulsory, so if any jump is possible only jumps are yielded'''
+        squares = self.squares
+        ownPieces = [square for square in range(32)
+                     if squares[square] != EMPTY and (squares[square] - 1) % 2 == self.turn]
+        foundJump = False
+        for square in ownPieces:
+            for move in self.jump_paths((square,), (), squares[square]):
+                foundJump = True
+                yield move
+        if foundJump:  # must jump
+            return
+        for square in ownPieces:
+            for direction in PIECE_DIRECTIONS[squares[square]]:
+                neighbor = NEIGHBORS[square][direction]
+                if neighbor is not None and squares[neighbor] == EMPTY:
+                    yield (square, neighbor), ()
+
+    def get_legal_moves(self):
+        '''CheckersPosition.get_legal_moves() -> list
+        returns the list of moves from generate_moves'''
+        return list(self.generate_moves())
+
+    def make_move(self, move):
+        '''CheckersPosition.make_move(move)
+        plays a (path,captured) move from generate_moves
+          and goes to the other player's turn
+        the move is recorded so undo_move can take it back'''
+        path, captured = move
+        squares = self.squares
+        piece = squares[path[0]]
+        self.undoStack.append((path, [(square, squares[square]) for square in captured],
+                               piece, self.hashKey))
+        hashKey = self.hashKey ^ PIECE_KEYS[piece][path[0]]
+        squares[path[0]] = EMPTY
+        for square in captured:
+            hashKey ^= PIECE_KEYS[squares[square]][square]
+            squares[square] = EMPTY
+        if piece in MAN and path[-1] in CROWN_SQUARES[piece_player(piece)]:
+            piece = KING[piece_player(piece)]  # made to last row
+        squares[path[-1]] = piece
+        self.hashKey = hashKey ^ PIECE_KEYS[piece][path[-1]]
+        self.next_turn()
+
+    def undo_move(self):
+        '''CheckersPosition.undo_move()
+        takes back the last move made with make_move'''
+        path, captured, piece, hashKey = self.undoStack.pop()
+        self.next_turn()
+        self.hashKey = hashKey
+        self.squares[path[-1]] = EMPTY
+        self.squares[path[0]] = piece
+        for square, capturedPiece in captured:
+            self.squares[square] = capturedPiece
+
+    def copy(self):
+        '''CheckersPosition.copy() -> CheckersPosition
+        returns a copy of self (without the move history, sharing the
+          endgame database)'''
+        newPosition = CheckersPosition()
+        newPosition.set_squares(self.squares, self.turn)
+        newPosition.endgameDatabase = self.endgameDatabase
+        return newPosition
+
+    def is_jump(self, move):
+        '''CheckersPosition.is_jump(move) -> bool
+        returns True if move (from generate_moves) captures, False if not'''
+        return len(move[1]) > 0
+
+    def evaluate(self):
+        '''CheckersPosition.evaluate() -> int
+        returns the value of the position for the player to move:
+          their material and advancement minus the opponent's'''
+        total = 0
+        for square in range(32):
+            piece = self.squares[square]
+            if piece == EMPTY:
+                continue
+            player = piece_player(piece)
+            if piece in KING:
+                value = KING_VALUE
+            else:  # rows moved away from the home row
+                row = SQUARE_COORDS[square][0]
+                value = MAN_VALUE + ADVANCE_VALUE * (row if player == 0 else 7 - row)
+            if player == self.turn:
+                total += value
+            else:
+                total -= value
+        return total
+
+    def probe_endgame(self):
+        '''CheckersPosition.probe_endgame() -> int or None
+        returns the value of the position for the player to move from
+          self.endgameDatabase (None if it isn't in the database)'''
+        if self.endgameDatabase is None or \
+                32 - self.squares.count(EMPTY) > self.endgameDatabase.maxPieces:
+            return None
+        result = self.endgameDatabase.lookup(self)
+        if result == WIN:
+            return DATABASE_WIN_VALUE + self.evaluate()
+        elif result == LOSS:
+            return -DATABASE_WIN_VALUE + self.evaluate()
+        elif result == DRAW:
+            return 0
+        return None  # not in the database
+
+    def order_moves(self, moves, firstMove=None, ply=None):
+        '''CheckersPosition.order_moves(moves[,firstMove,ply]) -> list
+        returns moves with the jumps that capture most first, normal
+          moves ordered by the killer moves for ply and then by history
+          score, and firstMove moved to the front'''
+        if len(moves[0][1]) > 0:  # jumps
+            orderedMoves = sorted(moves, key=lambda move: len(move[1]), reverse=True)
+        else:
+            killers = self.killers.get(ply, ())
+            history = self.history
+            orderedMoves = sorted(moves, reverse=True,
+                                  key=lambda move: (move in killers,
+                                                    history.get((move[0][0], move[0][-1]), 0)))
+        if firstMove in orderedMoves:
+            orderedMoves.remove(firstMove)
+            orderedMoves.insert(0, firstMove)
+        return orderedMoves
+
+    def add_cutoff(self, move, depth, ply):
+        '''CheckersPosition.add_cutoff(move,depth,ply)
+        records that the normal move move caused a cutoff at ply with
+          depth moves left to search, so it is tried earlier next time'''
+        fromTo = (move[0][0], move[0][-1])
+        self.history[fromTo] = self.history.get(fromTo, 0) + depth * depth
+        killers = self.killers.setdefault(ply, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]  # keep the 2 most recent
+
+    def quiescence(self, alpha, beta, deadline=None):
+        '''CheckersPosition.quiescence(alpha,beta[,deadline]) -> int
+        returns the value of the position once no captures are pending
+        forced jumps are played out so the search never stops in the
+          middle of an exchange'''
+        if deadline is not None and time.perf_counter() > deadline:
+            raise SearchTimeout
+        if self.stopEvent is not None and self.stopEvent.is_set():
+            raise SearchTimeout  # search was cancelled
+        self.nodes += 1
+        legalMoves = self.get_legal_moves()
+        if len(legalMoves) == 0:  # can't move, so lost
+            return -WIN_VALUE
+        if not self.is_jump(legalMoves[0]):  # quiet position
+            return self.evaluate()
+        for move in self.order_moves(legalMoves):
+            self.make_move(move)
+            try:
+                value = self.probe_endgame()
+                if value is None:
+                    value = self.quiescence(-beta, -alpha, deadline)
+                value = -value
+            finally:  # put the position back even if time ran out
+                self.undo_move()
+            if value > alpha:
+                alpha = value
+                if alpha >= beta:  # opponent won't allow this line
+                    break
+        return alpha
+
+    def alphabeta(self, depth, alpha=-WIN_VALUE - 1000, beta=WIN_VALUE + 1000,
+                  deadline=None, firstMove=None, table=None):
+        '''CheckersPosition.alphabeta(depth[,alpha,beta,deadline,firstMove,table]) -> value,move
+        searches depth moves ahead with alpha-beta pruning,
+          then plays out captures with quiescence
+        returns the value for the player to move and the best move
+          (None if the player can't move)
+        positions in self.endgameDatabase aren't searched any further
+          deadline is a time.perf_counter() value; raises SearchTimeout
+          if the search is still running after it (or once
+          self.stopEvent is set)
+          firstMove is searched first (usually the best move from a
+          shallower search)
+          table is a TranspositionTable for reusing results of positions
+          reached by different move orders'''
+        if deadline is not None and time.perf_counter() > deadline:
+            raise SearchTimeout
+        if self.stopEvent is not None and self.stopEvent.is_set():
+            raise SearchTimeout  # search was cancelled
+        self.nodes += 1
+        alphaOrig = alpha
+        if table is not None:
+            entry = table.lookup(self.hashKey)
+            if entry is not None:
+                key, entryDepth, entryValue, bound, entryMove = entry
+                if entryDepth >= depth and (bound == EXACT or
+                                            (bound == LOWER_BOUND and entryValue >= beta) or
+                                            (bound == UPPER_BOUND and entryValue <= alpha)):
+                    return entryValue, entryMove
+                if firstMove is None:  # try the stored best move first
+                    firstMove = entryMove
+        legalMoves = self.get_legal_moves()
+        if len(legalMoves) == 0:  # can't move, so lost
+            # losing sooner (more depth left) is worse
+            return -WIN_VALUE - depth, None
+        ply = len(self.undoStack)
+        bestValue = -WIN_VALUE - 1000
+        bestMove = None
+        for move in self.order_moves(legalMoves, firstMove, ply):
+            self.make_move(move)
+            try:
+                value = self.probe_endgame()  # exact result, if known
+                if value is None and depth > 1:
+                    value, reply = self.alphabeta(depth - 1, -beta, -alpha, deadline,
+                                                  table=table)
+                elif value is None:
+                    value = self.quiescence(-beta, -alpha, deadline)
+                value = -value
+            finally:  # put the position back even if time ran out
+                self.undo_move()
+            if value > bestValue:
+                bestValue = value
+                bestMove = move
+                alpha = max(alpha, value)
+                if alpha >= beta:  # opponent won't allow this line
+                    if len(move[1]) == 0:  # remember quiet moves that cut off
+                        self.add_cutoff(move, depth, ply)
+                    break
+        if table is not None:
+            if bestValue <= alphaOrig:  # real value may be lower
+                bound = UPPER_BOUND
+            elif bestValue >= beta:  # real value may be higher
+                bound = LOWER_BOUND
+            else:
+                bound = EXACT
+            table.store(self.hashKey, depth, bestValue, bound, bestMove)
+        return bestValue, bestMove
+
+    def iterative_deepening(self, time_limit, maxDepth=100, table=None):
+        '''CheckersPosition.iterative_deepening(time_limit[,maxDepth,table]) -> value,move
+        runs alphabeta at depth 1, 2, 3, ... until time_limit seconds pass
+          or maxDepth is reached
+        returns the result of the deepest completed search
+        the depth reached is stored in self.searchDepth
+          table is the TranspositionTable to use (a new one by default)
+        stops early once it finds a forced win or loss'''
+        return game_search.iterative_deepening(self, time_limit, maxDepth, table,
+                                               lambda value: abs(value) >= WIN_VALUE)
+
+    def choose_move(self, time_limit=None):
+        '''CheckersPosition.choose_move([time_limit]) -> move
+        returns the move the computer would make, without making it
+          (None if the player to move can't move)
+          time_limit is the number of seconds to search for
+          (None searches SEARCH_DEPTH moves ahead)'''
+        legalMoves = self.get_legal_moves()
+        if len(legalMoves) <= 1:  # nothing to think about
+            return legalMoves[0] if legalMoves else None
+        # start each search with fresh statistics and move ordering
+        self.nodes = 0
+        self.history = {}
+        self.killers = {}
+        self.table = TranspositionTable()
+        if time_limit is None:
+            value, move = self.alphabeta(SEARCH_DEPTH, table=self.table)
+            self.searchDepth = SEARCH_DEPTH
+        else:
+            value, move = self.iterative_deepening(time_limit, table=self.table)
+        return move
+
+    def get_search_stats(self):
+        '''CheckersPosition.get_search_stats() -> dict
+        returns the node count and depth of the last search, and the
+          counters and hit rate of its transposition table'''
+        return {'nodes': self.nodes, 'depth': self.searchDepth,
+                'table': self.table.get_stats() if self.table is not None else None}
+
+
+class HistoryNode:
+    '''one position in a GameHistory'''
+
+    def __init__(self, snapshot, parent=None, move=None):
+        '''HistoryNode(snapshot[,parent,move]) -> HistoryNode
+        snapshot is the position, from CheckersPosition.snapshot
+        move is the move that led here from the parent node'''
+        self.snapshot = snapshot
+        self.parent = parent
+        self.move = move
+        self.children = []  # nodes for the moves tried from here
+        self.redoChild = None  # the child redo goes to
+
+
+class GameHistory:
+    '''tree of the positions reached in a game, for undo, redo and
+      trying other lines of play
+    every line shares the nodes of the moves it has in common with the
+      others, and each node holds an immutable snapshot, so stepping
+      back and forth never copies or replays anything'''
+
+    def __init__(self, snapshot):
+        '''GameHistory(snapshot) -> GameHistory
+        starts a history at the position snapshot'''
+        self.root = HistoryNode(snapshot)
+        self.current = self.root
+
+    def record(self, move, snapshot):
+        '''GameHistory.record(move,snapshot)
+        adds the position snapshot, reached by playing move, after the
+          current position and makes it current
+        a move that was already tried from here reuses its branch'''
+        for child in self.current.children:
+            if child.snapshot == snapshot:
+                break
+        else:  # a new line of play
+            child = HistoryNode(snapshot, self.current, move)
+            self.current.children.append(child)
+        self.current.redoChild = child
+        self.current = child
+
+    def can_undo(self):
+        '''GameHistory.can_undo() -> bool
+        returns True if there is a position before the current one'''
+        return self.current.parent is not None
+
+    def can_redo(self):
+        '''GameHistory.can_redo() -> bool
+        returns True if there is a position after the current one'''
+        return self.current.redoChild is not None
+
+    def undo(self):
+        '''GameHistory.undo() -> bytes
+        goes back one position and returns its snapshot'''
+        self.current = self.current.parent
+        return self.current.snapshot
+
+    def redo(self):
+        '''GameHistory.redo() -> bytes
+        goes forward one position, along the line last played from here,
+          and returns its snapshot'''
+        self.current = self.current.redoChild
+        return self.current.snapshot
+
+    def next_line(self):
+        '''GameHistory.next_line() -> bytes or None
+        swaps the last move for the next other move tried from the
+          position before it, and returns the new current snapshot
+          (None if no other move was tried)'''
+        parent = self.current.parent
+        if parent is None or len(parent.children) < 2:
+            return None
+        index = parent.children.index(self.current)
+        self.current = parent.children[(index + 1) % len(parent.children)]
+        parent.redoChild = self.current
+        return self.current.snapshot
+
+    def get_line(self):
+        '''GameHistory.get_line() -> list
+        returns the moves from the start of the game to the current position'''
+        moves = []
+        node = self.current
+        while node.parent is not None:
+            moves.append(node.move)
+            node = node.parent
+        return moves[::-1]
 
 
 class CheckerSquare(Canvas):
@@ -21,6 +647,10 @@ class CheckerSquare(Canvas):
             self.bind('<Button>', master.on_click)
         self.player = None  # stores which player's piece is on the square
         self.isKing = False  # stores whether a king is on the square
+        # the checker and its crown are drawn once, then shown or hidden
+        self.checker = self.create_oval(10, 10, 50, 50, state='hidden')
+        self.crown = self.create_text(30, 40, text='*', font=('Arial', 48), state='hidden')
+        self.color = None  # fill of the checker
 
     def get_pos(self):
         '''CheckerSquare.get_pos() -> (int,int)
@@ -46,11 +676,12 @@ class CheckerSquare(Canvas):
     def clear_checker(self):
         '''CheckerSquare.clear_checker()
         removes a piece (if any) from the square'''
+        if self.player is not None:
+            self.itemconfig(self.checker, state='hidden')
+        if self.isKing:
+            self.itemconfig(self.crown, state='hidden')
         self.player = None
-        # clear all canvas items
-        objectList = self.find_all()
-        for obj in objectList:
-            self.delete(obj)
+        self.isKing = False
 
     def set_checker(self, player, color, isKing):
         '''CheckerSquare.set_checker(player,color,isKing)
@@ -58,56 +689,76 @@ class CheckerSquare(Canvas):
         player is the player number
         color is the player color
         isKing is True if the piece is a king, False if a normal piece'''
-        # clear old checker (if any)
-        self.clear_checker()
+        # only change the items that differ from what's showing
+        if self.player is None:
+            self.itemconfig(self.checker, fill=color, state='normal')
+        elif color != self.color:
+            self.itemconfig(self.checker, fill=color)
+        if isKing != self.isKing:
+            self.itemconfig(self.crown, state='normal' if isKing else 'hidden')
         # set attributes
         self.player = player
         self.isKing = isKing
-        # draw new checker
-        self.create_oval(10, 10, 50, 50, fill=color)
-        # draw king if necessary
-        if isKing:
-            self.create_text(30, 40, text='*', font=('Arial', 48))
+        self.color = color
 
     def no_click(self):
         '''CheckerSquare.no_click()
         make the square not respond to clicks'''
         self.unbind('<Button>')
 
+    def allow_click(self):
+        '''CheckerSquare.allow_click()
+        make a playable square respond to clicks again'''
+        if (self.row + self.column) % 2 == 1:
+            self.bind('<Button>', self.master.on_click)
+
 
 class CheckersGame(Frame):
     '''represents a game of checkers'''
 
-    def __init__(self, master):
-        '''CheckersGame(master) -> CheckersGame
-        creates a new game of checkers'''
+    def __init__(self, master, computerPlayer=None, timeLimit=None, endgameDatabase=None):
+        '''CheckersGame(master[,computerPlayer,timeLimit,endgameDatabase]) -> CheckersGame
+        creates a new game of checkers
+        computerPlayer is the color the computer plays (2-player by default)
+        timeLimit is the computer's thinking time per move in seconds
+          (None for a quick fixed-depth search)
+        endgameDatabase is a checkers_endgame.EndgameDatabase for the
+          computer to use'''
         # initialize and display the Frame
         Frame.__init__(self, master)
         self.grid()
         # set up attributes
+        self.position = CheckersPosition()  # the rules and pieces
+        self.position.endgameDatabase = endgameDatabase
         self.squares = {}  # dictionary to store the square
         # game colors
         self.boardColors = ['blanched almond', 'dark green']
         self.colors = ['red', 'white']
-        self.direction = [1, -1]  # the directions of "forward" motion
-        self.turn = 0  # who goes first
         self.pieceSelected = None  # keeps track of whether a piece has been clicked on
         self.jumpInProgress = False  # keeps track of whether a piece is in mid-jump
+        self.turnPath = []  # squares the piece moving this turn has been on
+        # the moves the player to move can make, from CheckersPosition
+        self.legalMoves = self.position.get_legal_moves()
+        self.gameOver = False
+        # every position of the game, for undo and redo
+        self.history = GameHistory(self.position.snapshot())
+        # the threading.Event that cancels the computer's search (None
+        #   when the computer isn't thinking)
+        self.searchStop = None
+        # set up computer player
+        if computerPlayer is not None:
+            # equals X if player X is computer
+            self.computerPlayer = self.colors.index(computerPlayer)
+        else:
+            self.computerPlayer = None  # no computer player
+        self.timeLimit = timeLimit
         # set up the empty board
         for row in range(8):
             for column in range(8):
                 color = self.boardColors[(row + column) % 2]
                 self.squares[(row, column)] = CheckerSquare(self, row, column, color)
-        # place the pieces for player 0
-        for row in range(3):
-            for index in range(4):
-                square = (row, 2 * index + ((row + 1) % 2))
-                self.squares[square].set_checker(0, self.colors[0], False)
-        # place the pieces for player 1
-        for row in range(5, 8):
-            for index in range(4):
-                square = (row, 2 * index + ((row + 1) % 2))
-                self.squares[square].set_checker(1, self.colors[1], False)
+        # place the pieces
+        self.update_squares(SQUARE_COORDS)
         # set up the display below the board
         self.rowconfigure(8, minsize=3)  # leave some space
         Label(self, text='Turn:', font=('Arial', 18)).grid(row=9, column=0, columnspan=2, sticky=E)
@@ -118,6 +769,12 @@ class CheckersGame(Frame):
         # set up message label (initially blank)
         self.message = Label(self, text="", font=('Arial', 18))
         self.message.grid(row=9, column=4, columnspan=4)
+        # set up the history buttons
+        Button(self, text='Undo', command=self.undo).grid(row=10, column=0, columnspan=2)
+        Button(self, text='Redo', command=self.redo).grid(row=10, column=2, columnspan=2)
+        Button(self, text='Next Line', command=self.next_line).grid(row=10, column=4, columnspan=2)
+        if self.position.turn == self.computerPlayer:
+            self.after(1000, self.take_computer_turn)
 
     def on_click(self, event):
         '''CheckersGame.on_click(event)
@@ -125,49 +782,42 @@ class CheckersGame(Frame):
         If clicked on a piece of the player's color:
           Sets that piece as the piece to be moved
         If clicked on a blank square
-          Attempts to move the previously selected piece to the blank square'''
+          Moves the previously selected piece to the blank square, if that
+          is the next step of one of the position's legal moves'''
         # get the coordinates of the clicked square and highlight it
         (row, col) = event.widget.get_pos()
         event.widget.focus_set()
+        position = self.position
+        turn = position.turn
+        if turn == self.computerPlayer:
+            return  # cannot move during computer's turn
         # check for click on a current player's piece, not in the middle of a multi-jump move
-        if self.squares[(row, col)].get_player() == self.turn and not self.jumpInProgress:
+        if position.get_player(row, col) == turn and not self.jumpInProgress:
             # set this square as the piece selected to move
             self.pieceSelected = (row, col)
         # check for click on a blank square if a piece has already been selected to move
-        elif self.pieceSelected and self.squares[(row, col)].is_empty():
-            # landing space selected -- check for valid move
+        elif self.pieceSelected and position.is_empty(row, col):
+            # landing space selected -- it must be the next step of a legal move
             (currentRow, currentCol) = self.pieceSelected
-            isKing = self.squares[(currentRow, currentCol)].is_king()  # piece is a king
-            # check for a valid normal move (no jump)
-            if ((row - currentRow == self.direction[self.turn]) or \
-                (isKing and row - currentRow == -self.direction[self.turn])) and \
-                    abs(col - currentCol) == 1:
-                # not allowed to make a normal move if a jump is possible
-                if self.player_can_jump():
+            path = tuple(self.turnPath) or (square_number(currentRow, currentCol),)
+            path += (square_number(row, col),)
+            moves = [move for move in self.legalMoves if move[0][:len(path)] == path]
+            if len(moves) == 0:
+                if position.player_can_jump() and not self.jumpInProgress:
+                    # not allowed to make a normal move if a jump is possible
                     self.message['text'] = 'Must jump!'
+            else:
+                if len(moves[0][1]) > 0:  # capturing moves jump every step
+                    self.jump(currentRow, currentCol, row, col)
                 else:
-                    # legal move into empty space
                     self.move(currentRow, currentCol, row, col)
+                if moves[0][0] == path:
+                    # the move is complete -- go to the next player's turn
                     self.next_turn()
-            # check for a valid jump
-            elif ((row - currentRow == (2 * self.direction[self.turn])) or \
-                  (isKing and row - currentRow == -(2 * self.direction[self.turn]))) and \
-                    abs(col - currentCol) == 2:
-                # check for jumped piece
-                jumpedRow = (row + currentRow) // 2
-                jumpedCol = (col + currentCol) // 2
-                if self.squares[(jumpedRow, jumpedCol)].get_player() == 1 - self.turn:
-                    # valid jump
-                    # also check that a non-king becomes a king -- this ends the turn
-                    self.jump(currentRow, currentCol, row, col)
-                    newKing = self.squares[(row, col)].is_king()
-                    if self.piece_can_jump(row, col) and (isKing or not newKing):
-                        # the piece just moved can still jump; must jump again
-                        self.jumpInProgress = True
-                        self.pieceSelected = (row, col)
-                    else:
-                        # no more jumps -- go to the next player's turn
-                        self.next_turn()
+                else:
+                    # the piece just moved can still jump; must jump again
+                    self.jumpInProgress = True
+                    self.pieceSelected = (row, col)
         elif not self.jumpInProgress:
             # clear the selected piece if a "bad" square is clicked
             self.pieceSelected = None
@@ -176,129 +826,200 @@ class CheckersGame(Frame):
             #  instead display a message
             self.message['text'] = 'Must continue jump!'
 
-    def piece_can_jump(self, row, col):
-        '''CheckersGame.piece_can_jump(row,col) -> bool
-        returns True if the piece at (row,col) can jump, False if not'''
-        direction = self.direction[self.turn]
-        # forward directions
-        if (0 <= row + 2 * direction < 8) and (0 <= col + 2 < 8) and \
-                (self.squares[(row + direction, col + 1)].get_player() == 1 - self.turn) and \
-                (self.squares[(row + 2 * direction, col + 2)].is_empty()):
-            return True
-        if (0 <= row + 2 * direction < 8) and (0 <= col - 2 < 8) and \
-                (self.squares[(row + direction, col - 1)].get_player() == 1 - self.turn) and \
-                (self.squares[(row + 2 * direction, col - 2)].is_empty()):
-            return True
-        # backwards directions -- only check if the piece is a king
-        if self.squares[(row, col)].is_king():
-            if (0 <= row - 2 * direction < 8) and (0 <= col + 2 < 8) and \
-                    (self.squares[(row - direction, col + 1)].get_player() == 1 - self.turn) and \
-                    (self.squares[(row - 2 * direction, col + 2)].is_empty()):
-                return True
-            if (0 <= row - 2 * direction < 8) and (0 <= col - 2 < 8) and \
-                    (self.squares[(row - direction, col - 1)].get_player() == 1 - self.turn) and \
-                    (self.squares[(row - 2 * direction, col - 2)].is_empty()):
-                return True
-        return False
-
-    def player_can_jump(self):
-        '''CheckersGame.player_can_jump() -> bool
-        returns True if any of the player's pieces can jump, False if not'''
-        # loop over the board, only looking at the dark squares
-        for row in range(8):
-            for column in range(8):
-                if (row + column) % 2 == 1 and \
-                        self.squares[(row, column)].get_player() == self.turn and \
-                        self.piece_can_jump(row, column):
-                    # found a player's piece that can jump, so return True
-                    return True
-        return False
-
-    def piece_can_move(self, row, col):
-        '''CheckersGame.piece_can_move(row,col) -> bool
-        returns True if the piece at (row,col) can make a normal move, False if not'''
-        direction = self.direction[self.turn]
-        # forward directions
-        if (0 <= row + direction < 8) and (0 <= col + 1 < 8) and \
-                (self.squares[(row + direction, col + 1)].is_empty()):
-            return True
-        if (0 <= row + direction < 8) and (0 <= col - 1 < 8) and \
-                (self.squares[(row + direction, col - 1)].is_empty()):
-            return True
-        # backwards directions -- only check if the piece is a king
-        if self.squares[(row, col)].is_king():
-            if (0 <= row - direction < 8) and (0 <= col + 1 < 8) and \
-                    (self.squares[(row - direction, col + 1)].is_empty()):
-                return True
-            if (0 <= row - direction < 8) and (0 <= col - 1 < 8) and \
-                    (self.squares[(row - direction, col - 1)].is_empty()):
-                return True
-        return False
-
-    def player_can_move(self):
-        '''CheckersGame.player_can_move() -> bool
-        returns True if any of the player's pieces can make a normal move, False if not'''
-        # loop over the board, only looking at the dark squares
-        for row in range(8):
-            for column in range(8):
-                if (row + column) % 2 == 1 and \
-                        self.squares[(row, column)].get_player() == self.turn and \
-                        self.piece_can_move(row, column):
-                    # found a player's piece that can move, so return True
-                    return True
-        return False
+    def update_squares(self, coordsList):
+        '''CheckersGame.update_squares(coordsList)
+        redraws the squares in coordsList to match the position'''
+        for (row, col) in coordsList:
+            piece = self.position.get_piece(row, col)
+            if piece == EMPTY:
+                self.squares[(row, col)].clear_checker()
+            else:
+                player = piece_player(piece)
+                self.squares[(row, col)].set_checker(player, self.colors[player], piece in KING)
 
     def move(self, oldr, oldc, newr, newc):
         '''CheckersGame.move(oldr,oldc,newr,newc)
         moves the piece that's on square (oldr,oldc) to square (newr,newc)'''
-        # check if the piece is a king
-        isKing = self.squares[(oldr, oldc)].is_king()
-        if newr == 7 * (1 - self.turn):  # made to last row, make it a king
-            isKing = True
-        # erase the piece from the old square, and place it in the new square
-        self.squares[(oldr, oldc)].clear_checker()
-        self.squares[(newr, newc)].set_checker(self.turn, self.colors[self.turn], isKing)
+        self.position.move(oldr, oldc, newr, newc)
+        self.update_squares([(oldr, oldc), (newr, newc)])
+        self.add_to_path(oldr, oldc, newr, newc)
+
+    def add_to_path(self, oldr, oldc, newr, newc):
+        '''CheckersGame.add_to_path(oldr,oldc,newr,newc)
+        records a step of this turn's move for the history'''
+        if len(self.turnPath) == 0:
+            self.turnPath.append(square_number(oldr, oldc))
+        self.turnPath.append(square_number(newr, newc))
 
     def jump(self, oldr, oldc, newr, newc):
         '''CheckersGame.jump(oldr,oldc,newr,newc)
         jumps the piece that's on square (oldr,oldc) to square (newr,newc)
         and removes the piece in between that got jumped over'''
-        # move the piece
-        self.move(oldr, oldc, newr, newc)
-        # remove jumped piece
-        jumpr = (oldr + newr) // 2
-        jumpc = (oldc + newc) // 2
-        self.squares[(jumpr, jumpc)].clear_checker()
+        self.position.jump(oldr, oldc, newr, newc)
+        self.update_squares([(oldr, oldc), (newr, newc),
+                             ((oldr + newr) // 2, (oldc + newc) // 2)])
+        self.add_to_path(oldr, oldc, newr, newc)
 
     def next_turn(self):
         '''CheckersGame.next_turn()
         goes to the other player's turn
         if that player can't move, the game is over and the previous player wins'''
-        # switch to other player and update the status indicators
-        self.turn = 1 - self.turn
-        self.turnChecker.set_checker(self.turn, self.colors[self.turn], False)
+        # switch to other player and save the position
+        self.position.next_turn()
+        self.history.record(tuple(self.turnPath), self.position.snapshot())
+        self.start_turn()
+
+    def start_turn(self):
+        '''CheckersGame.start_turn()
+        updates the status indicators for the player to move
+        if that player can't move, the game is over and the previous player wins'''
+        position = self.position
+        self.turnChecker.set_checker(position.turn, self.colors[position.turn], False)
         self.message['text'] = ''
         # reset the status attributes
         self.pieceSelected = None
         self.jumpInProgress = False
+        self.turnPath = []
         # check for a legal move
-        if not self.player_can_move() and not self.player_can_jump():
+        self.legalMoves = position.get_legal_moves()
+        if len(self.legalMoves) == 0:
             # no legal move, so the game is over
-            self.turn = 1 - self.turn  # previous player won
-            self.turnChecker.set_checker(self.turn, self.colors[self.turn], False)
-            self.message['text'] = self.colors[self.turn].title() + ' wins!'
+            winner = 1 - position.turn  # previous player won
+            self.turnChecker.set_checker(winner, self.colors[winner], False)
+            self.message['text'] = self.colors[winner].title() + ' wins!'
             # unbind all squares so winning player can't move anymore
             for square in self.squares.values():
                 square.no_click()
+            self.gameOver = True
+        elif position.turn == self.computerPlayer:
+            # wait a second then do turn
+            self.after(1000, self.take_computer_turn)
+
+    def show_snapshot(self, snapshot):
+        '''CheckersGame.show_snapshot(snapshot)
+        goes to the position snapshot from the history,
+          redrawing only the squares that differ
+        cancels the computer's search, which was for another position'''
+        self.cancel_search()
+        oldSquares = bytes(self.position.squares)
+        self.position.restore(snapshot)
+        self.update_squares([SQUARE_COORDS[square] for square in range(32)
+                             if oldSquares[square] != snapshot[square]])
+        if self.gameOver:  # let the players click again
+            for square in self.squares.values():
+                square.allow_click()
+            self.gameOver = False
+        self.start_turn()
+
+    def undo(self):
+        '''CheckersGame.undo()
+        event handler for Undo button
+        takes back the move in progress, or else the last move
+          (and the computer's move before it, so it is a person's turn)'''
+        if len(self.turnPath) > 0:  # in the middle of a multi-jump
+            self.show_snapshot(self.history.current.snapshot)
+            return
+        if not self.history.can_undo():
+            return
+        snapshot = self.history.undo()
+        while snapshot[32] == self.computerPlayer and self.history.can_undo():
+            snapshot = self.history.undo()
+        self.show_snapshot(snapshot)
+
+    def redo(self):
+        '''CheckersGame.redo()
+        event handler for Redo button
+        replays the next move (and the computer's reply after it)'''
+        if len(self.turnPath) > 0 or not self.history.can_redo():
+            return
+        snapshot = self.history.redo()
+        while snapshot[32] == self.computerPlayer and self.history.can_redo():
+            snapshot = self.history.redo()
+        self.show_snapshot(snapshot)
+
+    def next_line(self):
+        '''CheckersGame.next_line()
+        event handler for Next Line button
+        switches the last move to another move that was tried instead'''
+        if len(self.turnPath) > 0:
+            return
+        snapshot = self.history.next_line()
+        if snapshot is not None:
+            self.show_snapshot(snapshot)
+
+    def take_computer_turn(self):
+        '''CheckersGame.take_computer_turn()
+        starts the computer's search in a background thread
+        the display stays responsive; check_search picks up the move'''
+        if self.gameOver or self.position.turn != self.computerPlayer or \
+                self.searchStop is not None:
+            return  # moved through the history, or already thinking
+        searchPosition = self.position.copy()  # the thread gets its own position
+        self.searchStop = threading.Event()
+        searchPosition.stopEvent = self.searchStop
+        results = queue.Queue()
+        thread = threading.Thread(target=self.run_search,
+                                  args=(searchPosition, self.timeLimit, results),
+                                  daemon=True)
+        thread.start()
+        self.message['text'] = 'Thinking...'
+        self.after(100, self.check_search, searchPosition, self.searchStop, results)
+
+    def run_search(self, searchPosition, timeLimit, results):
+        '''CheckersGame.run_search(searchPosition,timeLimit,results)
+        runs in the search thread: puts the move chosen for searchPosition
+          into the results queue (doesn't touch any widgets)'''
+        try:
+            results.put(searchPosition.choose_move(timeLimit))
+        except SearchTimeout:  # cancelled before finding a move
+            pass
+
+    def check_search(self, searchPosition, stop, results):
+        '''CheckersGame.check_search(searchPosition,stop,results)
+        polls the search thread and plays its move once it is done
+          (unless the search was cancelled)'''
+        if stop.is_set():  # cancelled; ignore whatever it finds
+            return
+        try:
+            move = results.get_nowait()
+        except queue.Empty:  # still thinking
+            self.after(100, self.check_search, searchPosition, stop, results)
+            return
+        self.searchStop = None
+        self.play_move(move)
+
+    def cancel_search(self):
+        '''CheckersGame.cancel_search()
+        stops the computer's search, if it is running'''
+        if self.searchStop is not None:
+            self.searchStop.set()
+            self.searchStop = None
+            self.message['text'] = ''
+
+    def play_move(self, move):
+        '''CheckersGame.play_move(move)
+        makes a whole move from CheckersPosition.generate_moves
+          and goes to the next player's turn'''
+        path, captured = move
+        for start, end in zip(path, path[1:]):
+            (oldr, oldc) = SQUARE_COORDS[start]
+            (newr, newc) = SQUARE_COORDS[end]
+            if abs(newr - oldr) == 2:
+                self.jump(oldr, oldc, newr, newc)
+            else:
+                self.move(oldr, oldc, newr, newc)
+        self.next_turn()
 
 
-def play_checkers():
-    '''play_checkers()
-    starts a new 2-player game of checkers'''
+def play_checkers(computerPlayer=None, timeLimit=None, endgameDatabase=None):
+    '''play_checkers([computerPlayer,timeLimit,endgameDatabase])
+    starts a new game of checkers
+      computerPlayer is the color the computer plays (2-player by default)'''
     root = Tk()
     root.title('Checkers')
-    CG = CheckersGame(root)
+    CG = CheckersGame(root, computerPlayer, timeLimit, endgameDatabase)
     CG.mainloop()
 
 
-play_checkers()
+if __name__ == '__main__':
+    play_checkers()
@@ -1,5 +1,10 @@
 from tkinter import *
 
+# the rules come from checker-final.py: CheckersPosition keeps the pieces
+#   on the 32 dark squares and generates moves from its neighbor and jump tables
+from checkers_rules import (CheckersPosition, GameHistory, square_number, piece_player,
+                            SQUARE_COORDS, EMPTY, KING)
+
 
 class CheckerTile(Canvas):
     """ represents a square in checkers
@@ -23,8 +28,17 @@ class CheckerTile(Canvas):
         self.coord = (r, c)
         self.selected = False
         self.bind('<Button-1>', master.get_click)
-        self.rect_id = 0    # objectId for rectangle frame
-        self.oval_id = 0    # objectId for oval
+        # the canvas items are made once and shown or hidden as needed
+        self.oval_id = self.create_oval(9, 9, 40, 40, state='hidden')    # objectId for oval
+        self.king_id = self.create_text(25, 33, text='*', font=('Arial', 36),
+                                        state='hidden')    # objectId for king marker
+        # objectId for legal destination marker
+        self.highlight_id = self.create_rectangle(3, 3, 47, 47, width=3, outline='yellow',
+                                                  state='hidden')
+        self.rect_id = self.create_rectangle(0, 0, 49, 49, width=5,
+                                             state='hidden')    # objectId for rectangle frame
+        self.piece = False
+        self.king = False
         self.color = 'blanched almond'
 
     def get_color(self):
@@ -34,24 +48,47 @@ class CheckerTile(Canvas):
         return self.coord
 
     def has_piece(self):
-        if self.oval_id == 0:
-            return False
-        else:
-            return True
+        return self.piece
 
-    def place_piece(self, color):
-        '''ReversiSquare.make_color(color)
-        changes color of piece on square to specified color'''
-        if self.oval_id == 0:
-            self.oval_id = self.create_oval(9, 9, 40, 40, fill=color)
+    def place_piece(self, color, king=False):
+        '''CheckerTile.place_piece(color[,king])
+        puts a piece of the specified color on the square
+        king is True to mark the piece as a king'''
+        if not self.piece or color != self.color:
+            self.itemconfig(self.oval_id, fill=color, state='normal')
+            self.piece = True
             self.color = color
+        if king and not self.king:
+            self.itemconfig(self.king_id, state='normal')
+            self.king = True
 
     def remove_piece(self):
-        if self.oval_id != 0:
-            self.delete(self.oval_id)
-            self.oval_id = 0
+        if self.piece:
+            self.itemconfig(self.oval_id, state='hidden')
+            self.piece = False
+        if self.king:
+            self.itemconfig(self.king_id, state='hidden')
+            self.king = False
         self.color = 'blanched almond'
 
+    def highlight(self):
+        '''CheckerTile.highlight()
+        marks the square as somewhere the selected piece can go'''
+        self.itemconfig(self.highlight_id, state='normal')
+
+    def unhighlight(self):
+        self.itemconfig(self.highlight_id, state='hidden')
+
+    def select(self):
+        if not self.selected:
+            self.itemconfig(self.rect_id, state='normal')
+            self.selected = True
+
+    def deselect(self):
+        if self.selected:
+            self.itemconfig(self.rect_id, state='hidden')
+            self.selected = False
+
 
 class CheckerGame(Frame):
 
@@ -59,72 +96,196 @@ class CheckerGame(Frame):
         Frame.__init__(self, master, bg='white')
         self.grid()
         self.current_player = 0
+        self.position = CheckersPosition()  # the pieces and the rules
+        self.legal_moves = self.position.get_legal_moves()
+        # squares the selected piece has been on this turn
+        #   (more than one while it is in the middle of a multi-jump)
+        self.path = []
+        # next square on the path: the legal moves that go there
+        self.next_squares = {}
+        # every position of the game, for undo and redo
+        self.history = GameHistory(self.position.snapshot())
         self.board = CheckerBoard(self)
         self.board.update_turn(self)
-        self.starting_coord = ()
-        self.last_coord = ()
+        self.starting_coord = None
+        self.last_coord = None
         self.colors = ['red', 'white']
 
     def get_click(self, event):
         coord = event.widget.get_coord()
-        square = self.board.tiles[coord]
+        square = square_number(*coord)
 
         # first click or second click?
-        if self.starting_coord is not ():
+        if self.starting_coord is not None:
             # move to next
             # check whether it is the same square
             if self.starting_coord == coord:
-                self.deselect(coord)
+                if len(self.path) > 1:
+                    print("illegal move, must finish jumping")
+                else:
+                    self.deselect(coord)
+                    self.path = []
             else:  # different square
                 # first validate the move is legal
                 if self.validate(self.starting_coord, coord):
                     # move piece
+                    moves = self.next_squares[square]
                     self.move_piece(self.starting_coord, coord)
-                    self.starting_coord = ()
-                    self.current_player = (self.current_player + 1) % 2
-                    self.board.update_turn(self)
-                    self.last_coord = coord
+                    self.path.append(square)
+                    if moves[0][0] == tuple(self.path):
+                        # the move is complete (a jump that can go on has to)
+                        self.finish_move(moves[0])
+                        self.last_coord = coord
+                    else:  # more jumps to make
+                        self.starting_coord = coord
+                        self.find_next_squares()
                 else:
                     print("illegal move, validation failed")
         else:
             # first click
             # cancel selection of last player
-            if self.last_coord != ():
+            if self.last_coord is not None:
                 self.deselect(self.last_coord)
-            if square.color != self.colors[self.current_player]:
+            piece = self.position.get_piece(*coord) if square is not None else 0
+            if piece == 0:
+                print("illegal move: must select your piece")
+            elif piece_player(piece) != self.current_player:
                 print("illegal move, must pick your own color")
-            elif self.board.tiles[coord].has_piece():
+            elif not any(move[0][0] == square for move in self.legal_moves):
+                if self.position.player_can_jump():
+                    print("illegal move, must jump")
+                else:
+                    print("illegal move, that piece can't move")
+            else:
                 self.starting_coord = coord
+                self.path = [square]
                 self.select(coord)
-            else:
-                print("illegal move: must select your piece")
+                self.find_next_squares()
+
+    def find_next_squares(self):
+        '''CheckerGame.find_next_squares()
+        works out where the selected piece can go next and highlights it'''
+        self.clear_highlights()
+        depth = len(self.path)
+        self.next_squares = {}
+        for move in self.legal_moves:
+            if list(move[0][:depth]) == self.path:
+                self.next_squares.setdefault(move[0][depth], []).append(move)
+        for square in self.next_squares:
+            self.board.tiles[SQUARE_COORDS[square]].highlight()
+
+    def clear_highlights(self):
+        for square in self.next_squares:
+            self.board.tiles[SQUARE_COORDS[square]].unhighlight()
+        self.next_squares = {}
+
+    def finish_move(self, move):
+        '''CheckerGame.finish_move(move)
+        plays move in the position and goes to the other player'''
+        self.clear_highlights()
+        self.position.make_move(move)
+        end = SQUARE_COORDS[move[0][-1]]
+        if self.position.get_piece(*end) in KING:  # crowned
+            self.board.tiles[end].place_piece(self.board.tiles[end].color, king=True)
+        self.path = []
+        self.starting_coord = None
+        self.history.record(move[0], self.position.snapshot())
+        self.start_turn()
+
+    def start_turn(self):
+        '''CheckerGame.start_turn()
+        gets ready for the player to move in the position'''
+        self.current_player = self.position.turn
+        self.board.update_turn(self)
+        self.legal_moves = self.position.get_legal_moves()
+        if len(self.legal_moves) == 0:
+            print(self.colors[1 - self.current_player].title() + " wins!")
+
+    def draw_square(self, square):
+        '''CheckerGame.draw_square(square)
+        makes the tile for square number square match the position'''
+        tile = self.board.tiles[SQUARE_COORDS[square]]
+        piece = self.position.squares[square]
+        if piece == EMPTY or (tile.king and piece not in KING):
+            tile.remove_piece()
+        if piece != EMPTY:
+            tile.place_piece(self.colors[piece_player(piece)], piece in KING)
+
+    def show_snapshot(self, snapshot):
+        '''CheckerGame.show_snapshot(snapshot)
+        goes to the position snapshot from the history,
+        redrawing only the tiles that differ'''
+        changed = {square for square in range(32)
+                   if self.position.squares[square] != snapshot[square]}
+        # tiles already changed by a multi-jump that isn't finished
+        for start, end in zip(self.path, self.path[1:]):
+            (startRow, startCol), (endRow, endCol) = SQUARE_COORDS[start], SQUARE_COORDS[end]
+            changed.update((start, end,
+                            square_number((startRow + endRow) // 2, (startCol + endCol) // 2)))
+        # cancel any selection
+        for coord in (self.starting_coord, self.last_coord):
+            if coord is not None:
+                self.deselect(coord)
+        self.path = []
+        self.last_coord = None
+        self.position.restore(snapshot)
+        for square in changed:
+            self.draw_square(square)
+        self.start_turn()
+
+    def undo(self):
+        '''CheckerGame.undo()
+        event handler for Undo button
+        takes back the move in progress, or else the last move'''
+        if len(self.path) > 1:  # in the middle of a multi-jump
+            self.show_snapshot(self.history.current.snapshot)
+        elif self.history.can_undo():
+            self.show_snapshot(self.history.undo())
+
+    def redo(self):
+        '''CheckerGame.redo()
+        event handler for Redo button
+        replays the move that was undone'''
+        if len(self.path) <= 1 and self.history.can_redo():
+            self.show_snapshot(self.history.redo())
+
+    def next_line(self):
+        '''CheckerGame.next_line()
+        event handler for Next Line button
+        switches the last move to another move that was tried instead'''
+        if len(self.path) <= 1:
+            snapshot = self.history.next_line()
+            if snapshot is not None:
+                self.show_snapshot(snapshot)
 
     def select(self, coord):
         self.starting_coord = coord
-        self.board.tiles[coord].rect_id = self.board.tiles[coord].create_rectangle(0,0,49,49,width=5)
+        self.board.tiles[coord].select()
         return
 
     def deselect(self, coord):
-        self.starting_coord = ()
-        if self.board.tiles[coord].rect_id != 0:
-            self.board.tiles[coord].delete(self.board.tiles[coord].rect_id)
+        self.starting_coord = None
+        self.board.tiles[coord].deselect()
+        self.clear_highlights()
         return
 
     def move_piece(self, start, end):
         starting_square = self.board.tiles[start]
         square = self.board.tiles[end]
         color = starting_square.color
+        king = starting_square.king
         self.deselect(start)
         starting_square.remove_piece()
+        if abs(end[0] - start[0]) == 2:  # jumped, so take the jumped piece
+            self.board.tiles[((start[0] + end[0]) // 2, (start[1] + end[1]) // 2)].remove_piece()
         self.select(end)
-        square.place_piece(color)
+        square.place_piece(color, king)
 
 
     def validate(self, start, coord):
-        if self.board.tiles[coord].has_piece():
-            return False
-        else:
-            return True
+        '''CheckerGame.validate(start,coord) -> bool
+        returns True if the selected piece at start can go to coord next'''
+        return square_number(*coord) in self.next_squares
 
 
 class CheckerBoard():
@@ -148,14 +309,15 @@ class CheckerBoard():
         self.turnSquare.place_piece(self.colors[master.current_player])
         self.turnLabel = CheckerTile(master, 9, 1)
         self.turnLabel.create_text(25,25,text='Turn')
+        # history buttons
+        Button(master, text='Undo', command=master.undo).grid(row=10, column=0, columnspan=2)
+        Button(master, text='Redo', command=master.redo).grid(row=10, column=2, columnspan=2)
+        Button(master, text='Next Line', command=master.next_line).grid(row=10, column=4,
+                                                                       columnspan=2)
         self.starting_coord = None
 
     def update_turn(self, master):
-        if self.turnSquare.oval_id != 0:
-            self.turnSquare.delete(self.turnSquare.oval_id)
-            self.turnSquare.oval_id = 0
-        else:
-            self.turnSquare.place_piece(self.colors[master.current_player])
+        self.turnSquare.place_piece(self.colors[master.current_player])
 
 
 def play_checkers():
@@ -165,4 +327,5 @@ def play_checkers():
     C.mainloop()
 
 
-play_checkers()
+if __name__ == '__main__':
+    play_checkers()
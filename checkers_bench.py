@@ -0,0 +1,152 @@
+'''perft, rules checks and speed benchmarks for the checkers engine
+
+run as a script, for example
+  python checkers_bench.py --perft-depth 8 --output bench.jsonl
+to check move generation against the published perft counts for
+American checkers, check the rules on a few hand-made positions and time
+the engine; results are printed as JSON (and appended to --output as one
+line per run, so runs from different commits can be compared)'''
+import game_bench
+from checkers_rules import CheckersPosition, TranspositionTable, MAN, KING
+from game_bench import bench_main, rate, time_calls
+
+# number of leaf positions after depth moves from the starting position
+#   (a multi-jump counts as one move)
+PERFT_REFERENCE = {1: 7, 2: 49, 3: 302, 4: 1469, 5: 7361, 6: 36768,
+                   7: 179740, 8: 845931, 9: 3963680, 10: 18391564}
+
+# (description, pieces, player to move, expected moves) for the rules checks
+#   pieces maps square numbers to pieces; moves are (path,captured)
+RULE_CASES = [
+    ('a jump must be taken',
+     {9: MAN[0], 0: MAN[0], 13: MAN[1]}, 0,
+     [((9, 16), (13,))]),
+    ('a multi-jump is one move',
+     {1: MAN[0], 5: MAN[1], 13: MAN[1]}, 0,
+     [((1, 8, 17), (5, 13))]),
+    ('crowning ends a jump',
+     {21: MAN[0], 25: MAN[1], 26: MAN[1]}, 0,
+     [((21, 30), (25,))]),
+    ('kings move backwards',
+     {17: KING[0], 28: MAN[1]}, 0,
+     [((17, 13), ()), ((17, 14), ()), ((17, 21), ()), ((17, 22), ())]),
+    ('men only move forwards',
+     {17: KING[0], 28: MAN[1]}, 1,
+     [((28, 24), ())]),
+    ('kings jump backwards',
+     {17: KING[0], 13: MAN[1]}, 0,
+     [((17, 8), (13,))]),
+    ('no pieces that can move means no moves',
+     {28: MAN[0], 24: MAN[1]}, 0,
+     []),
+]
+
+
+def position_from_pieces(pieces, turn=0):
+    '''position_from_pieces(pieces[,turn]) -> CheckersPosition
+    returns a position with the given pieces (a dict of square
+      number: piece) and player turn to move'''
+    squares = bytearray(32)
+    for square, piece in pieces.items():
+        squares[square] = piece
+    position = CheckersPosition()
+    position.set_squares(squares, turn)
+    return position
+
+
+def check_rules():
+    '''check_rules() -> list
+    returns the descriptions of the RULE_CASES the engine gets wrong'''
+    failures = []
+    for description, pieces, turn, expected in RULE_CASES:
+        moves = position_from_pieces(pieces, turn).get_legal_moves()
+        if sorted(moves) != sorted(expected):
+            failures.append(description)
+    return failures
+
+
+def perft(position, depth):
+    '''perft(position,depth) -> int
+    returns the number of leaf positions depth moves ahead of position
+      (a position with no moves is a finished game and counts as a leaf)'''
+    if depth == 0:
+        return 1
+    moves = position.get_legal_moves()
+    if len(moves) == 0:
+        return 1
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        position.make_move(move)
+        nodes += perft(position, depth - 1)
+        position.undo_move()
+    return nodes
+
+
+def sample_positions(count=200, seed=0):
+    '''sample_positions([count,seed]) -> list
+    returns count CheckersPositions from random games, spread over all
+      stages of the game, for timing'''
+    positions = game_bench.sample_positions(CheckersPosition, CheckersPosition.make_move,
+                                            80, count, seed)
+    for position in positions:
+        position.undoStack = []  # start each search from ply 0
+    return positions
+
+
+def run_benchmarks(minSeconds=1.0, searchDepth=4, seed=0):
+    '''run_benchmarks([minSeconds,searchDepth,seed]) -> dict
+    times move generation, make/undo, evaluation and alphabeta (with
+      and without a transposition table) on sampled positions
+    returns operations (or search nodes) per second for each'''
+    positions = sample_positions(seed=seed)
+    # (position,move) pairs for make_move/undo_move
+    positionMoves = [(position, move) for position in positions
+                     for move in position.get_legal_moves()]
+    results = {}
+    results['get_legal_moves'] = rate(*time_calls(
+        lambda position: position.get_legal_moves(), positions, minSeconds))
+
+    def make_undo(positionMove):
+        positionMove[0].make_move(positionMove[1])
+        positionMove[0].undo_move()
+    results['make_undo'] = rate(*time_calls(make_undo, positionMoves, minSeconds))
+    results['evaluate'] = rate(*time_calls(
+        lambda position: position.evaluate(), positions, minSeconds))
+    # searches report nodes per second rather than calls per second
+    tableCounts = {'hits': 0, 'misses': 0}  # totals over alphabeta_table's tables
+
+    def search(position):
+        position.alphabeta(searchDepth)
+
+    def search_with_table(position):
+        table = TranspositionTable()  # fresh table for each search
+        position.alphabeta(searchDepth, table=table)
+        tableCounts['hits'] += table.hits
+        tableCounts['misses'] += table.misses
+    for name, function in (('alphabeta', search), ('alphabeta_table', search_with_table)):
+        for position in positions:
+            position.nodes = 0
+        searches, seconds = time_calls(function, positions[:20], minSeconds)
+        nodes = sum(position.nodes for position in positions[:20])
+        results[name] = rate(nodes, seconds)
+        results[name]['depth'] = searchDepth
+        results[name]['searches'] = searches
+    probes = tableCounts['hits'] + tableCounts['misses']
+    results['alphabeta_table']['hitRate'] = tableCounts['hits'] / probes if probes else 0.0
+    return results
+
+
+def main():
+    '''main()
+    runs the rules checks, perft and the benchmarks and prints the
+      results as JSON
+    exits with status 1 if a rules check fails or a perft count doesn't
+      match the reference'''
+    bench_main('Checkers perft and benchmarks.', CheckersPosition, perft, PERFT_REFERENCE,
+               run_benchmarks, 4, 'depth for the alphabeta benchmark', check_rules)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,383 @@
+'''win/loss/draw endgame databases for the checkers computer player
+
+the database holds the exact result of every position with a few pieces
+left; it is built offline by retrograde analysis, for example
+  python checkers_endgame.py checkers.db --pieces 4
+and used by passing EndgameDatabase('checkers.db') to play_checkers
+
+positions are always stored from the side to move's point of view
+(player 1 to move is turned around into player 0 to move), grouped by
+material signature: (player 0 men, player 0 kings, player 1 men,
+player 1 kings); inside a signature each placement of the pieces has a
+fixed combinatorial index, and each result takes 2 bits of a
+memory-mapped file, so a lookup reads one byte and never searches'''
+import argparse
+import array
+import bisect
+import itertools
+import math
+import mmap
+import struct
+import time
+
+from checkers_rules import (CheckersPosition, NEIGHBORS, JUMPS, PIECE_DIRECTIONS, CROWN_SQUARES,
+                            EMPTY, MAN, KING, DRAW, WIN, LOSS)
+
+MAGIC = b'CKEG'
+HEADER = struct.Struct('<4sII')  # magic, most pieces, number of signatures
+# signature: the 4 piece counts, offset of its results, number of results
+SIGNATURE = struct.Struct('<BBBBQQ')
+# bytes.translate table that swaps the players' pieces
+SWAP_PLAYERS = bytes([EMPTY, MAN[1], MAN[0], KING[1], KING[0]]) + bytes(range(5, 256))
+# squares each player's men can stand on (men are crowned on the far row)
+MAN_SQUARES = (tuple(range(28)), tuple(range(4, 32)))
+# directions player 0's pieces came from on their last move (by piece):
+#   men only move forwards, so they came from behind
+UNMOVE_DIRECTIONS = {MAN[0]: PIECE_DIRECTIONS[MAN[1]], KING[0]: PIECE_DIRECTIONS[KING[0]]}
+# added to a position's count of undecided moves if it also has a move
+#   to a drawn position, so the count never reaches 0 and it isn't lost
+DRAW_EXIT = 128
+
+
+def turn_around(squares):
+    '''turn_around(squares) -> bytes
+    returns squares rotated half a turn with the players swapped,
+      so player 1's position is seen as player 0's'''
+    return bytes(squares[::-1]).translate(SWAP_PLAYERS)
+
+
+def oriented_squares(position):
+    '''oriented_squares(position) -> bytes
+    returns the position's squares seen with player 0 to move'''
+    if position.turn == 0:
+        return bytes(position.squares)
+    return turn_around(position.squares)
+
+
+def get_signature(squares):
+    '''get_signature(squares) -> tuple
+    returns (player 0 men,player 0 kings,player 1 men,player 1 kings)'''
+    return (squares.count(MAN[0]), squares.count(KING[0]),
+            squares.count(MAN[1]), squares.count(KING[1]))
+
+
+def signature_size(signature):
+    '''signature_size(signature) -> int
+    returns the number of indexes used by a material signature
+      (men of the two players are indexed separately, so the few
+      placements where they'd share a square are unused indexes)'''
+    men0, kings0, men1, kings1 = signature
+    return math.comb(28, men0) * math.comb(28, men1) * \
+        math.comb(32 - men0 - men1, kings0) * math.comb(32 - men0 - men1 - kings0, kings1)
+
+
+# COMBINATIONS[n][k] is n choose k, for ranking sets of squares
+COMBINATIONS = tuple(tuple(math.comb(n, k) for k in range(33)) for n in range(33))
+# CHOOSE_COLUMNS[k][n] is n choose k (increasing in n, so it can be bisected)
+CHOOSE_COLUMNS = tuple(zip(*COMBINATIONS))
+
+
+def position_index(squares, signature):
+    '''position_index(squares,signature) -> int
+    returns the index of squares (player 0 to move) within its signature
+    each kind of piece is ranked with the combinatorial number system:
+      men by their squares (player 1's counted from square 4), kings by
+      their place among the squares left free by the pieces before them'''
+    men0, kings0, men1, kings1 = signature
+    # rank of each kind of piece, number of it seen so far
+    man0Rank = man1Rank = king0Rank = king1Rank = 0
+    man0Count = man1Count = king0Count = king1Count = 0
+    for square in range(32):
+        piece = squares[square]
+        if piece == EMPTY:
+            continue
+        if piece == MAN[0]:
+            man0Count += 1
+            man0Rank += COMBINATIONS[square][man0Count]
+        elif piece == MAN[1]:
+            man1Count += 1
+            man1Rank += COMBINATIONS[square - 4][man1Count]
+        elif piece == KING[0]:
+            king0Count += 1
+            king0Rank += COMBINATIONS[square - man0Count - man1Count][king0Count]
+        else:
+            king1Count += 1
+            king1Rank += COMBINATIONS[square - man0Count - man1Count - king0Count][king1Count]
+    index = man0Rank * COMBINATIONS[28][men1] + man1Rank
+    index = index * COMBINATIONS[32 - men0 - men1][kings0] + king0Rank
+    return index * COMBINATIONS[32 - men0 - men1 - kings0][kings1] + king1Rank
+
+
+def combination_ranks(rank, count):
+    '''combination_ranks(rank,count) -> list
+    returns the count numbers (in increasing order) whose rank in the
+      combinatorial number system is rank (undoes the ranking in
+      position_index)'''
+    numbers = []
+    for k in range(count, 0, -1):
+        # the largest number whose k-combinations don't exceed rank
+        number = bisect.bisect_right(CHOOSE_COLUMNS[k], rank) - 1
+        rank -= CHOOSE_COLUMNS[k][number]
+        numbers.append(number)
+    return numbers[::-1]
+
+
+def index_squares(index, signature):
+    '''index_squares(index,signature) -> bytearray
+    returns the squares (player 0 to move) at index within signature
+      (the placement position_index gives index to)
+    indexes where both players' men would share a square give squares
+      with fewer pieces than signature'''
+    men0, kings0, men1, kings1 = signature
+    index, king1Rank = divmod(index, COMBINATIONS[32 - men0 - men1 - kings0][kings1])
+    index, king0Rank = divmod(index, COMBINATIONS[32 - men0 - men1][kings0])
+    man0Rank, man1Rank = divmod(index, COMBINATIONS[28][men1])
+    squares = bytearray(32)
+    for square in combination_ranks(man0Rank, men0):
+        squares[square] = MAN[0]
+    for square in combination_ranks(man1Rank, men1):
+        squares[square + 4] = MAN[1]
+    # kings are ranked by their place among the squares still free
+    for piece, rank, count in ((KING[0], king0Rank, kings0), (KING[1], king1Rank, kings1)):
+        if count == 0:
+            continue
+        free = [square for square in range(32) if squares[square] == EMPTY]
+        for place in combination_ranks(rank, count):
+            squares[free[place]] = piece
+    return squares
+
+
+def signature_positions(signature):
+    '''signature_positions(signature) -> generator
+    yields the squares (as a bytearray, player 0 to move) of every
+      placement of the pieces in signature'''
+    men0, kings0, men1, kings1 = signature
+    for men0Squares in itertools.combinations(MAN_SQUARES[0], men0):
+        for men1Squares in itertools.combinations(MAN_SQUARES[1], men1):
+            if set(men0Squares) & set(men1Squares):
+                continue
+            free = [square for square in range(32)
+                    if square not in men0Squares and square not in men1Squares]
+            for kings0Squares in itertools.combinations(free, kings0):
+                rest = [square for square in free if square not in kings0Squares]
+                for kings1Squares in itertools.combinations(rest, kings1):
+                    squares = bytearray(32)
+                    for pieceSquares, piece in ((men0Squares, MAN[0]), (men1Squares, MAN[1]),
+                                                (kings0Squares, KING[0]), (kings1Squares, KING[1])):
+                        for square in pieceSquares:
+                            squares[square] = piece
+                    yield squares
+
+
+def signature_groups(maxPieces):
+    '''signature_groups(maxPieces) -> list
+    returns lists of the signatures with up to maxPieces pieces and at
+      least one piece each, in the order they have to be solved:
+      captures only lead to fewer pieces and crowning only to fewer men,
+      so each group depends only on itself and earlier groups'''
+    groups = []
+    for total in range(2, maxPieces + 1):
+        for men in range(total + 1):
+            group = []
+            for men0 in range(men + 1):
+                men1 = men - men0
+                for kings0 in range(total - men + 1):
+                    kings1 = total - men - kings0
+                    if men0 + kings0 > 0 and men1 + kings1 > 0:
+                        group.append((men0, kings0, men1, kings1))
+            if group:
+                groups.append(group)
+    return groups
+
+
+def can_jump(squares, ownSquares):
+    '''can_jump(squares,ownSquares) -> bool
+    returns True if one of player 0's pieces, on ownSquares, has a jump
+      in squares, False if not'''
+    for square in ownSquares:
+        piece = squares[square]
+        for direction in PIECE_DIRECTIONS[piece]:
+            jump = JUMPS[square][direction]
+            if jump is not None and squares[jump[1]] == EMPTY and \
+                    (squares[jump[0]] == MAN[1] or squares[jump[0]] == KING[1]):
+                return True
+    return False
+
+
+def unmove_parents(squares):
+    '''unmove_parents(squares) -> generator
+    yields the squares (player 0 to move) of every position that reaches
+      squares (player 0 to move) by a normal move that doesn't crown
+      (the only moves that keep a position in its signature group)'''
+    # the parent's pieces are player 0's after turning the board around
+    moved = turn_around(squares)
+    ownSquares = [square for square in range(32) if moved[square] in UNMOVE_DIRECTIONS]
+    for square in ownSquares:
+        piece = moved[square]
+        for direction in UNMOVE_DIRECTIONS[piece]:
+            origin = NEIGHBORS[square][direction]
+            if origin is None or moved[origin] != EMPTY:
+                continue
+            parent = bytearray(moved)
+            parent[origin] = piece
+            parent[square] = EMPTY
+            parentSquares = [origin if own == square else own for own in ownSquares]
+            if not can_jump(parent, parentSquares):  # else it had to jump
+                yield parent
+
+
+def build_database(maxPieces=4, verbose=False):
+    '''build_database([maxPieces,verbose]) -> dict
+    solves every position with up to maxPieces pieces by retrograde analysis
+    returns a dict mapping each signature to a bytearray with one result
+      (DRAW, WIN or LOSS for the player to move) per index
+    each group of signatures is solved in two steps:
+      a forward pass over every position uses the results of moves that
+      leave the group (captures and crowning, already solved) and counts
+      the moves that stay in it
+      the positions decided so far are then taken back one move at a time
+      (unmove_parents): a parent with a move to a lost position is won,
+      and a parent whose moves all turn out won for the opponent is lost
+    positions that are never decided are draws'''
+    tables = {}
+    position = CheckersPosition()
+    for group in signature_groups(maxPieces):
+        startTime = time.perf_counter()
+        # counts[signature][index] is the number of moves from that position
+        #   that stay in the group and aren't decided yet (plus DRAW_EXIT)
+        counts = {}
+        # indexes of positions decided but not yet taken back, by signature
+        solved = {}
+        for signature in group:
+            table = tables[signature] = bytearray(signature_size(signature))
+            countTable = counts[signature] = bytearray(len(table))
+            solvedIndexes = solved[signature] = array.array('Q')
+            for squares in signature_positions(signature):
+                position.set_squares(squares)
+                result = LOSS  # if no moves, or every move loses
+                count = 0
+                for move in position.generate_moves():
+                    path, captured = move
+                    if not captured and (squares[path[0]] in KING or
+                                         path[-1] not in CROWN_SQUARES[0]):
+                        count += 1  # stays in the group; decided later
+                        continue
+                    position.make_move(move)
+                    childSquares = turn_around(position.squares)
+                    position.undo_move()
+                    childSignature = get_signature(childSquares)
+                    if childSignature[0] + childSignature[1] == 0:
+                        result = WIN  # took the last piece
+                        break
+                    childResult = tables[childSignature][position_index(childSquares,
+                                                                        childSignature)]
+                    if childResult == LOSS:
+                        result = WIN
+                        break
+                    if childResult == DRAW:
+                        result = DRAW  # at least a draw
+                index = position_index(squares, signature)
+                if result == WIN or count == 0:
+                    if result != DRAW:
+                        table[index] = result
+                        solvedIndexes.append(index)
+                else:
+                    countTable[index] = count + (DRAW_EXIT if result == DRAW else 0)
+        # take back moves from the decided positions until none are left
+        while any(solved.values()):
+            for signature in group:
+                solvedIndexes, solved[signature] = solved[signature], array.array('Q')
+                for index in solvedIndexes:
+                    childResult = tables[signature][index]
+                    # the parents have the child's pieces with the players swapped
+                    parentSignature = signature[2:] + signature[:2]
+                    for parent in unmove_parents(index_squares(index, signature)):
+                        parentIndex = position_index(parent, parentSignature)
+                        parentTable = tables[parentSignature]
+                        if parentTable[parentIndex] != DRAW:
+                            continue  # already decided
+                        if childResult == LOSS:
+                            parentTable[parentIndex] = WIN
+                        else:
+                            counts[parentSignature][parentIndex] -= 1
+                            if counts[parentSignature][parentIndex] > 0:
+                                continue
+                            parentTable[parentIndex] = LOSS
+                        solved[parentSignature].append(parentIndex)
+        if verbose:
+            print('solved {} in {:.1f}s'.format(
+                ' '.join(''.join(map(str, signature)) for signature in group),
+                time.perf_counter() - startTime))
+    return tables
+
+
+def write_database(fileName, tables, maxPieces):
+    '''write_database(fileName,tables,maxPieces)
+    writes the tables from build_database to fileName,
+      packing 4 results into each byte'''
+    signatures = sorted(tables)
+    offset = HEADER.size + SIGNATURE.size * len(signatures)
+    directory = []
+    for signature in signatures:
+        directory.append(SIGNATURE.pack(*signature, offset, len(tables[signature])))
+        offset += (len(tables[signature]) + 3) // 4
+    with open(fileName, 'wb') as databaseFile:
+        databaseFile.write(HEADER.pack(MAGIC, maxPieces, len(signatures)))
+        databaseFile.write(b''.join(directory))
+        for signature in signatures:
+            table = tables[signature] + bytes(-len(tables[signature]) % 4)
+            databaseFile.write(bytes(table[i] | table[i + 1] << 2 |
+                                     table[i + 2] << 4 | table[i + 3] << 6
+                                     for i in range(0, len(table), 4)))
+
+
+class EndgameDatabase:
+    '''read-only endgame database backed by a memory-mapped file'''
+
+    def __init__(self, fileName):
+        '''EndgameDatabase(fileName)
+        opens the database file made by write_database'''
+        with open(fileName, 'rb') as databaseFile:
+            self.data = mmap.mmap(databaseFile.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.maxPieces, numSignatures = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise ValueError(fileName + ' is not a checkers endgame database')
+        self.offsets = {}  # signature: offset of its results
+        for i in range(numSignatures):
+            *signature, offset, count = SIGNATURE.unpack_from(
+                self.data, HEADER.size + SIGNATURE.size * i)
+            self.offsets[tuple(signature)] = offset
+
+    def close(self):
+        '''EndgameDatabase.close()
+        closes the database file'''
+        self.data.close()
+
+    def lookup(self, position):
+        '''EndgameDatabase.lookup(position) -> int or None
+        returns DRAW, WIN or LOSS for the player to move in position
+          (None if the position isn't in the database)'''
+        squares = oriented_squares(position)
+        signature = get_signature(squares)
+        offset = self.offsets.get(signature)
+        if offset is None:
+            return None
+        index = position_index(squares, signature)
+        return (self.data[offset + index // 4] >> (2 * (index % 4))) & 3
+
+
+def main():
+    '''main()
+    builds a database file from the command line'''
+    parser = argparse.ArgumentParser(description='Build a checkers endgame database.')
+    parser.add_argument('fileName', help='database file to write')
+    parser.add_argument('--pieces', type=int, default=4,
+                        help='most pieces on the board (default 4)')
+    args = parser.parse_args()
+    tables = build_database(args.pieces, verbose=True)
+    write_database(args.fileName, tables, args.pieces)
+    print('wrote {} signatures to {}'.format(len(tables), args.fileName))
+
+
+if __name__ == '__main__':
+    main()
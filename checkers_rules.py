@@ -0,0 +1,24 @@
+'''the checkers rules and computer player from checker-final.py
+
+checker-final.py can't be imported with a normal import statement (its
+name isn't a Python identifier), so it is imported here once and the
+other checkers modules import its names from this module, for example
+  from checkers_rules import CheckersPosition, EMPTY, MAN, KING'''
+import importlib
+
+checkerFinal = importlib.import_module('checker-final')
+
+# CheckersPosition keeps the pieces on the 32 dark squares and generates
+#   moves from its neighbor and jump tables
+CheckersPosition = checkerFinal.CheckersPosition
+GameHistory = checkerFinal.GameHistory
+TranspositionTable = checkerFinal.TranspositionTable
+square_number = checkerFinal.square_number
+piece_player = checkerFinal.piece_player
+SQUARE_COORDS = checkerFinal.SQUARE_COORDS
+NEIGHBORS = checkerFinal.NEIGHBORS
+JUMPS = checkerFinal.JUMPS
+PIECE_DIRECTIONS = checkerFinal.PIECE_DIRECTIONS
+CROWN_SQUARES = checkerFinal.CROWN_SQUARES
+EMPTY, MAN, KING = checkerFinal.EMPTY, checkerFinal.MAN, checkerFinal.KING
+DRAW, WIN, LOSS = checkerFinal.DRAW, checkerFinal.WIN, checkerFinal.LOSS  # for the player to move
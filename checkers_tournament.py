@@ -0,0 +1,239 @@
+'''headless checkers matches between computer players
+
+run as a script, for example
+  python checkers_tournament.py alphabeta:4 time:0.5 --pairs 20
+to play 20 pairs of games and print the results as JSON
+
+each pair starts from the same opening (all the ways the first few moves
+can go, taken in turn) and the engines swap colors for the second game,
+so neither engine gets a better opening or color; games that reach the
+move limit or repeat a position 3 times are drawn'''
+import argparse
+import json
+import math
+import multiprocessing
+import random
+import time
+
+from checkers_rules import CheckersPosition, TranspositionTable
+
+# a game with this many moves (by both players together) is a draw
+MAX_MOVES = 200
+# a position (with the same player to move) reached this often is a draw
+REPETITIONS = 3
+
+
+def make_engine(name):
+    '''make_engine(name) -> function
+    returns a function that takes a CheckersPosition and returns
+      (move,nodes searched) for the player to move
+    name is one of
+      'random'       -- a random legal move
+      'greedy'       -- the move that captures most (random among ties)
+      'alphabeta:k'  -- CheckersPosition.alphabeta at depth k
+      'time:s'       -- CheckersPosition.iterative_deepening for s seconds'''
+    kind, sep, setting = name.partition(':')
+    if kind == 'random':
+        return lambda position: (random.choice(position.get_legal_moves()), 0)
+    if kind == 'greedy':
+        def greedy(position):
+            moves = position.get_legal_moves()
+            most = max(len(move[1]) for move in moves)
+            return random.choice([move for move in moves if len(move[1]) == most]), 0
+        return greedy
+    if kind == 'alphabeta':
+        depth = int(setting or 1)
+
+        def search(position):
+            searchPosition = position.copy()
+            value, move = searchPosition.alphabeta(depth, table=TranspositionTable())
+            return move, searchPosition.nodes
+        return search
+    if kind == 'time':
+        timeLimit = float(setting or 1)
+
+        def timed_search(position):
+            searchPosition = position.copy()
+            value, move = searchPosition.iterative_deepening(timeLimit)
+            return move, searchPosition.nodes
+        return timed_search
+    raise ValueError('unknown engine: ' + name)
+
+
+def opening_suite(plies=2):
+    '''opening_suite([plies]) -> list
+    returns every sequence of plies moves from the starting position,
+      in move generation order, as lists of (path,captured) moves'''
+    openings = [[]]
+    for ply in range(plies):
+        longerOpenings = []
+        for opening in openings:
+            position = CheckersPosition()
+            for move in opening:
+                position.make_move(move)
+            for move in position.get_legal_moves():
+                longerOpenings.append(opening + [move])
+        openings = longerOpenings
+    return openings
+
+
+def play_game(engineNames, opening, seed, maxMoves=MAX_MOVES):
+    '''play_game(engineNames,opening,seed[,maxMoves]) -> dict
+    plays one game between the engines named in engineNames,
+      starting with the moves in opening
+      engineNames[0] plays player 0 (red), engineNames[1] plays player 1
+    seed seeds the random module, so every game can be replayed
+    returns the winner (0, 1 or 'draw'), why the game ended, number of
+      moves, and each player's nodes searched and thinking time'''
+    random.seed(seed)
+    engines = [make_engine(name) for name in engineNames]
+    position = CheckersPosition()
+    for move in opening:
+        position.make_move(move)
+    nodes = [0, 0]
+    seconds = [0.0, 0.0]
+    seen = {}  # how often each position has come up
+    numMoves = len(opening)
+    winner = 'draw'
+    reason = 'move limit'
+    while numMoves < maxMoves:
+        seen[position.hashKey] = seen.get(position.hashKey, 0) + 1
+        if seen[position.hashKey] >= REPETITIONS:
+            reason = 'repetition'
+            break
+        player = position.turn
+        if len(position.get_legal_moves()) == 0:  # can't move, so lost
+            winner = 1 - player
+            reason = 'no moves'
+            break
+        startTime = time.perf_counter()
+        move, moveNodes = engines[player](position)
+        seconds[player] += time.perf_counter() - startTime
+        nodes[player] += moveNodes
+        position.make_move(move)
+        numMoves += 1
+    return {'winner': winner, 'reason': reason, 'moves': numMoves,
+            'nodes': nodes, 'seconds': seconds}
+
+
+def play_game_job(job):
+    '''play_game_job(job) -> dict
+    unpacks a (engineNames,opening,seed,maxMoves) job for Pool.imap'''
+    return play_game(*job)
+
+
+def elo_estimate(pairScores, z=1.96):
+    '''elo_estimate(pairScores[,z]) -> dict
+    returns the Elo difference matching the average of pairScores (each
+      pair's score between 0 and 1), with a confidence interval of z
+      standard errors (95% by default)
+    the interval uses the sample variance of the pair scores, which
+      accounts for both games of a pair starting from the same opening;
+      with fewer than 2 pairs, or if every pair scored the same, there is
+      no spread to measure, so it falls back to treating the games as
+      independent wins and losses (method 'binomial' instead of 'pairs')
+    a score of 0 or 1 has no finite Elo: the estimate is kept half a
+      game inside it ('clamped' says so), and an interval end that
+      reaches it is None, meaning unbounded'''
+    numPairs = len(pairScores)
+    if numPairs == 0:
+        return {'elo': None, 'low': None, 'high': None, 'score': None,
+                'method': None, 'clamped': False}
+    margin = 0.5 / (2 * numPairs)  # half a game, as a share of all games
+
+    def elo(score):
+        return 400 * math.log10(score / (1 - score))
+    score = sum(pairScores) / numPairs
+    clampedScore = min(max(score, margin), 1 - margin)
+    method = 'pairs'
+    variance = 0
+    if numPairs > 1:
+        variance = sum((pairScore - score) ** 2 for pairScore in pairScores) / (numPairs - 1)
+    if variance == 0:  # each pair is 2 games, so half a game's variance
+        method = 'binomial'
+        variance = clampedScore * (1 - clampedScore) / 2
+    error = z * math.sqrt(variance / numPairs)
+    return {'elo': elo(clampedScore),
+            'low': elo(score - error) if score - error > 0 else None,
+            'high': elo(score + error) if score + error < 1 else None,
+            'score': score, 'method': method, 'clamped': clampedScore != score}
+
+
+def run_tournament(engineA, engineB, pairs=50, seed=0, processes=None,
+                   openingPlies=2, maxMoves=MAX_MOVES):
+    '''run_tournament(engineA,engineB[,pairs,seed,processes,openingPlies,maxMoves]) -> dict
+    plays pairs of games between engineA and engineB across a process pool
+    pair i starts both games from the (i mod number of openings)th
+      opening of opening_suite(openingPlies); engineA plays red in the
+      first game and white in the second
+    game j uses seed + j, so results don't depend on how the pool
+      splits up the work
+    returns engineA's wins, draws and losses, how games ended, engineA's
+      Elo difference with a 95% confidence interval, and each engine's
+      search speed in nodes per second'''
+    openings = opening_suite(openingPlies)
+    jobs = []
+    for i in range(pairs):
+        opening = openings[i % len(openings)]
+        jobs.append(((engineA, engineB), opening, seed + 2 * i, maxMoves))
+        jobs.append(((engineB, engineA), opening, seed + 2 * i + 1, maxMoves))
+    results = {'engines': [engineA, engineB], 'pairs': pairs, 'games': 2 * pairs,
+               'wins': 0, 'draws': 0, 'losses': 0, 'endings': {}}
+    nodes = [0, 0]  # engineA's and engineB's totals
+    seconds = [0.0, 0.0]
+    pairScores = []
+    totalMoves = 0
+    startTime = time.perf_counter()
+    with multiprocessing.Pool(processes) as pool:
+        for j, game in enumerate(pool.imap(play_game_job, jobs)):
+            seatA = j % 2  # the player number engineA had
+            if game['winner'] == 'draw':
+                results['draws'] += 1
+                scoreA = 0.5
+            elif game['winner'] == seatA:
+                results['wins'] += 1
+                scoreA = 1.0
+            else:
+                results['losses'] += 1
+                scoreA = 0.0
+            if seatA == 0:  # first game of the pair
+                pairScores.append(scoreA / 2)
+            else:
+                pairScores[-1] += scoreA / 2
+            results['endings'][game['reason']] = results['endings'].get(game['reason'], 0) + 1
+            nodes[0] += game['nodes'][seatA]
+            nodes[1] += game['nodes'][1 - seatA]
+            seconds[0] += game['seconds'][seatA]
+            seconds[1] += game['seconds'][1 - seatA]
+            totalMoves += game['moves']
+    results['elo'] = elo_estimate(pairScores)
+    results['nodesPerSecond'] = [nodes[i] / seconds[i] if seconds[i] else 0.0
+                                 for i in range(2)]
+    results['averageGameLength'] = totalMoves / (2 * pairs) if pairs else 0.0
+    results['wallSeconds'] = time.perf_counter() - startTime
+    return results
+
+
+def main():
+    '''main()
+    runs a tournament from the command line and prints the results as JSON'''
+    parser = argparse.ArgumentParser(description='Play checkers engines against each other.')
+    parser.add_argument('engineA', help='random, greedy, alphabeta:k or time:s')
+    parser.add_argument('engineB', help='the opposing engine')
+    parser.add_argument('--pairs', type=int, default=50,
+                        help='number of color-swapped game pairs to play')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the first game')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='worker processes (default: one per CPU)')
+    parser.add_argument('--opening-plies', type=int, default=2,
+                        help='moves already played in each opening (default 2)')
+    parser.add_argument('--max-moves', type=int, default=MAX_MOVES,
+                        help='moves before a game is drawn (default {})'.format(MAX_MOVES))
+    args = parser.parse_args()
+    results = run_tournament(args.engineA, args.engineB, args.pairs, args.seed,
+                             args.processes, args.opening_plies, args.max_moves)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
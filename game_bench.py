@@ -0,0 +1,114 @@
+'''benchmark pieces shared by reversi_bench.py and checkers_bench.py
+
+both scripts sample positions from random games, time engine calls on
+them and print (and optionally append to a file) one JSON result per
+run with bench_main'''
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+
+
+def sample_positions(new_position, play_move, maxMoves, count=200, seed=0):
+    '''sample_positions(new_position,play_move,maxMoves[,count,seed]) -> list
+    returns count positions from random games, spread over all stages
+      of the game, for timing
+      new_position() returns a starting position, which must have a
+      get_legal_moves() method, and play_move(position,move) plays a move
+      each game stops after a random number (below maxMoves) of moves;
+      positions where the player to move can't move are skipped'''
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        position = new_position()
+        stopAt = rng.randrange(0, maxMoves)  # number of moves into the game
+        for i in range(stopAt):
+            moves = position.get_legal_moves()
+            if len(moves) == 0:
+                break
+            play_move(position, rng.choice(moves))
+        if len(position.get_legal_moves()) > 0:
+            positions.append(position)
+    return positions
+
+
+def time_calls(function, items, minSeconds):
+    '''time_calls(function,items,minSeconds) -> (int,float)
+    calls function on every item, repeating until minSeconds have passed
+    returns the number of calls and the time they took'''
+    calls = 0
+    startTime = time.perf_counter()
+    elapsed = 0
+    while elapsed < minSeconds:
+        for item in items:
+            function(item)
+        calls += len(items)
+        elapsed = time.perf_counter() - startTime
+    return calls, elapsed
+
+
+def rate(count, seconds):
+    '''rate(count,seconds) -> dict
+    returns a benchmark result with count per second'''
+    return {'count': count, 'seconds': seconds,
+            'perSecond': count / seconds if seconds else 0.0}
+
+
+def git_commit():
+    '''git_commit() -> str or None
+    returns the current git commit, if there is one'''
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_main(description, new_position, perft, perftReference, run_benchmarks,
+               searchDepth, searchHelp, check_rules=None):
+    '''bench_main(description,new_position,perft,perftReference,run_benchmarks,
+                  searchDepth,searchHelp[,check_rules])
+    parses the command line, runs the rules checks, perft and the
+      benchmarks and prints the results as JSON
+      perft(position,depth) counts leaves from new_position(), checked
+      against perftReference (a dict of depth: count)
+      run_benchmarks(minSeconds,searchDepth) returns the benchmark results
+      searchDepth and searchHelp are the default and help text for
+      --search-depth
+      check_rules() returns the rules checks that failed
+    exits with status 1 if a rules check fails or a perft count doesn't
+      match the reference'''
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--perft-depth', type=int, default=6,
+                        help='deepest perft to run (default 6)')
+    parser.add_argument('--search-depth', type=int, default=searchDepth,
+                        help=searchHelp)
+    parser.add_argument('--seconds', type=float, default=1.0,
+                        help='minimum time for each benchmark')
+    parser.add_argument('--output', help='file to append the JSON results to')
+    args = parser.parse_args()
+    results = {'commit': git_commit(), 'time': time.time(),
+               'python': platform.python_version(), 'perft': {}}
+    ruleFailures = []
+    if check_rules is not None:
+        ruleFailures = results['ruleFailures'] = check_rules()
+    perftOk = True
+    for depth in range(1, args.perft_depth + 1):
+        startTime = time.perf_counter()
+        nodes = perft(new_position(), depth)
+        seconds = time.perf_counter() - startTime
+        expected = perftReference.get(depth)
+        if expected is not None and nodes != expected:
+            perftOk = False
+        results['perft'][depth] = dict(rate(nodes, seconds), expected=expected)
+    results['perftOk'] = perftOk
+    results['benchmarks'] = run_benchmarks(args.seconds, args.search_depth)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'a') as outputFile:
+            outputFile.write(json.dumps(results) + '\n')
+    if not perftOk or len(ruleFailures) > 0:
+        sys.exit(1)
@@ -0,0 +1,121 @@
+'''search pieces shared by the Reversi and checkers computer players
+
+both games hash positions with Zobrist keys from zobrist_keys, cache
+search results in a TranspositionTable and search with
+iterative_deepening, which works with any position object that has an
+alphabeta(depth[,alpha,beta,deadline,firstMove,table]) method'''
+import random
+import time
+
+# transposition table bound types
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+ZOBRIST_SEED = 2017  # fixed seed so hashes are repeatable
+
+
+def zobrist_keys(numPieces, numSquares):
+    '''zobrist_keys(numPieces,numSquares) -> tuple,int
+    returns random 64-bit keys for a Zobrist hash: a tuple of numSquares
+      keys for each of numPieces kinds of piece, and the key for player 1
+      to move
+    a position's hash is the XOR of the key for every (piece, square),
+      plus the player key if it is player 1's turn'''
+    zobristRandom = random.Random(ZOBRIST_SEED)
+    pieceKeys = tuple(tuple(zobristRandom.getrandbits(64) for square in range(numSquares))
+                      for piece in range(numPieces))
+    return pieceKeys, zobristRandom.getrandbits(64)
+
+
+class SearchTimeout(Exception):
+    '''raised inside a search when its time budget runs out'''
+
+
+class TranspositionTable:
+    '''fixed-size table of search results keyed by Zobrist hash'''
+
+    def __init__(self, size=65536, replacement='depth'):
+        '''TranspositionTable([size,replacement])
+        creates an empty table with size slots
+        replacement decides what happens when two positions share a slot:
+          'depth' keeps the result of the deeper search
+          'always' keeps the newest result'''
+        if replacement not in ('depth', 'always'):
+            raise ValueError('unknown replacement policy: ' + str(replacement))
+        self.size = size
+        self.replacement = replacement
+        self.clear()
+
+    def clear(self):
+        '''TranspositionTable.clear()
+        removes all entries and resets the counters'''
+        # each slot is None or (key,depth,value,bound,move)
+        self.slots = [None] * self.size
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def lookup(self, key):
+        '''TranspositionTable.lookup(key) -> tuple or None
+        returns the (key,depth,value,bound,move) entry for key, if stored'''
+        entry = self.slots[key % self.size]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, value, bound, move):
+        '''TranspositionTable.store(key,depth,value,bound,move)
+        saves a search result, following the replacement policy
+          bound is EXACT, LOWER_BOUND or UPPER_BOUND'''
+        index = key % self.size
+        oldEntry = self.slots[index]
+        if oldEntry is not None and oldEntry[0] != key:
+            # different position in this slot
+            if self.replacement == 'depth' and oldEntry[1] > depth:
+                return  # keep the deeper result
+            self.evictions += 1
+        self.slots[index] = (key, depth, value, bound, move)
+        self.stores += 1
+
+    def get_stats(self):
+        '''TranspositionTable.get_stats() -> dict
+        returns the table's counters and hit rate'''
+        probes = self.hits + self.misses
+        return {'size': self.size, 'replacement': self.replacement,
+                'hits': self.hits, 'misses': self.misses,
+                'hitRate': self.hits / probes if probes else 0.0,
+                'stores': self.stores, 'evictions': self.evictions}
+
+
+def iterative_deepening(position, time_limit, maxDepth, table=None, isFinal=None,
+                        search=None):
+    '''iterative_deepening(position,time_limit,maxDepth[,table,isFinal,search]) -> value,move
+    runs position.alphabeta at depth 1, 2, 3, ... until time_limit seconds
+      pass or maxDepth is reached, trying the last depth's move first
+    returns the result of the deepest completed search
+    the depth reached is stored in position.searchDepth and the table
+      used in position.table
+      table is the TranspositionTable to use (a new one by default)
+      isFinal(value) returns True if no deeper search can change value
+      (a forced win, say), which stops the search early
+      search is called like position.alphabeta to search each depth
+      (position.alphabeta by default)'''
+    deadline = time.perf_counter() + time_limit
+    if search is None:
+        search = position.alphabeta
+    if table is None:
+        table = TranspositionTable()
+    position.table = table  # keep it around to read its stats
+    # depth 1 always completes so there is always a move to return
+    value, move = search(1, table=table)
+    position.searchDepth = 1
+    for depth in range(2, maxDepth + 1):
+        if isFinal is not None and isFinal(value):
+            break
+        try:
+            value, move = search(depth, deadline=deadline, firstMove=move, table=table)
+        except SearchTimeout:  # out of time, keep previous result
+            break
+        position.searchDepth = depth
+    return value, move
@@ -1,5 +1,348 @@
 from tkinter import *
+import abc
+import multiprocessing
+import queue
 import random
+import threading
+import time
+
+import game_search
+from game_search import EXACT, LOWER_BOUND, UPPER_BOUND, SearchTimeout, zobrist_keys
+
+try:  # only needed for NumpyPatternEvaluator
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# the board is stored as two 64-bit ints, one per player
+# bit (8 * row + column) is set if the player has a piece at (row,column)
+FULL_MASK = (1 << 64) - 1
+NOT_COLUMN_0 = 0xfefefefefefefefe  # every square except column 0
+NOT_COLUMN_7 = 0x7f7f7f7f7f7f7f7f  # every square except column 7
+# (shift, mask) for the 8 directions
+# the mask removes pieces that wrapped around to the other side of the board
+LEFT_SHIFTS = ((1, NOT_COLUMN_0), (8, FULL_MASK),
+               (9, NOT_COLUMN_0), (7, NOT_COLUMN_7))
+RIGHT_SHIFTS = ((1, NOT_COLUMN_7), (8, FULL_MASK),
+                (9, NOT_COLUMN_7), (7, NOT_COLUMN_0))
+
+# Zobrist keys for each (player, square) piece and for player 1 to move
+PIECE_KEYS, PLAYER_KEY = zobrist_keys(2, 64)
+# flipping a piece XORs out one player's key and XORs in the other's
+FLIP_KEYS = tuple(PIECE_KEYS[0][square] ^ PIECE_KEYS[1][square]
+                  for square in range(64))
+# value of each square to the player who has a piece on it
+SQUARE_VALUES = ((99, -8, 8, 6, 6, 8, -8, 99),
+                 (-8, -24, -4, -3, -3, -4, -24, -8),
+                 (8, -4, 7, 4, 4, 7, -4, 8),
+                 (6, -3, 4, 0, 0, 4, -3, 6),
+                 (6, -3, 4, 0, 0, 4, -3, 6),
+                 (8, -4, 7, 4, 4, 7, -4, 8),
+                 (-8, -24, -4, -3, -3, -4, -24, -8),
+                 (99, -8, 8, 6, 6, 8, -8, 99))
+CORNER_MASK = 0x8100000000000081
+EDGE_MASK = 0xff818181818181ff
+# the four 4x4 quadrants of the board, for endgame parity
+QUADRANT_MASKS = (0x000000000f0f0f0f, 0x00000000f0f0f0f0,
+                  0x0f0f0f0f00000000, 0xf0f0f0f000000000)
+# computer_turn solves the game exactly once this few squares are empty
+ENDGAME_EMPTIES = 12
+# seconds computer_turn gives the endgame solver when it has no time limit
+ENDGAME_TIME_LIMIT = 0.5
+# endgame solver sorts moves by opponent mobility above this many empties
+ENDGAME_FASTEST_FIRST = 6
+
+
+def square_mask(coords):
+    '''square_mask(coords) -> int
+    returns the bitboard with only the (row,column) square coords set'''
+    return 1 << (8 * coords[0] + coords[1])
+
+
+def mask_to_coords(mask):
+    '''mask_to_coords(mask) -> list
+    returns the (row,column) squares set in mask, in row-major order'''
+    squares = []
+    while mask:
+        lowBit = mask & -mask  # lowest set square
+        index = lowBit.bit_length() - 1
+        squares.append((index >> 3, index & 7))
+        mask ^= lowBit
+    return squares
+
+
+def zobrist_hash(bitboards, player):
+    '''zobrist_hash(bitboards,player) -> int
+    returns the Zobrist hash of the position from scratch'''
+    key = PLAYER_KEY if player == 1 else 0
+    for piece in range(2):
+        for row, column in mask_to_coords(bitboards[piece]):
+            key ^= PIECE_KEYS[piece][8 * row + column]
+    return key
+
+
+def flip_keys(flips):
+    '''flip_keys(flips) -> int
+    returns the value to XOR into a hash when the pieces in flips change color'''
+    key = 0
+    while flips:
+        lowBit = flips & -flips
+        key ^= FLIP_KEYS[lowBit.bit_length() - 1]
+        flips ^= lowBit
+    return key
+
+
+def stable_edge_mask(own):
+    '''stable_edge_mask(own) -> int
+    returns own's pieces that can never be flipped because they are in
+      a corner or in an unbroken line along an edge from one of own's corners
+    also works on numpy arrays of uint64 bitboards'''
+    stable = own & CORNER_MASK
+    for i in range(6):  # grow along the edges one square at a time
+        stable |= (((stable << 1) & NOT_COLUMN_0) | ((stable >> 1) & NOT_COLUMN_7) |
+                   (stable << 8) | (stable >> 8)) & own & EDGE_MASK
+    return stable
+
+
+def legal_move_mask(own, opp):
+    '''legal_move_mask(own,opp) -> int
+    returns the bitboard of legal moves for the player with pieces own
+      against the player with pieces opp'''
+    empty = ~(own | opp) & FULL_MASK
+    moves = 0
+    # slide along runs of opponent pieces in each direction
+    #   a run is at most 6 long, then the next square must be empty
+    for shift, mask in LEFT_SHIFTS:
+        run = (own << shift) & mask & opp
+        for i in range(5):
+            run |= (run << shift) & mask & opp
+        moves |= (run << shift) & mask & empty
+    for shift, mask in RIGHT_SHIFTS:
+        run = (own >> shift) & mask & opp
+        for i in range(5):
+            run |= (run >> shift) & mask & opp
+        moves |= (run >> shift) & mask & empty
+    return moves
+
+
+def flip_mask(own, opp, move):
+    '''flip_mask(own,opp,move) -> int
+    returns the bitboard of opponent pieces flipped when the player with
+      pieces own plays on the single-bit square move'''
+    flips = 0
+    for shift, mask in LEFT_SHIFTS:
+        line = 0
+        square = (move << shift) & mask
+        while square & opp:  # keep going over opponent pieces
+            line |= square
+            square = (square << shift) & mask
+        if square & own:  # run is capped by the player's piece
+            flips |= line
+    for shift, mask in RIGHT_SHIFTS:
+        line = 0
+        square = (move >> shift) & mask
+        while square & opp:
+            line |= square
+            square = (square >> shift) & mask
+        if square & own:
+            flips |= line
+    return flips
+
+
+def parity_order(empty, moveMask):
+    '''parity_order(empty,moveMask) -> list
+    returns the single-bit moves in moveMask, moves in quadrants with an
+      odd number of empty squares first (parity: try to get the last move
+      in each region)'''
+    oddMoves = []
+    evenMoves = []
+    for quadrant in QUADRANT_MASKS:
+        quadrantMoves = moveMask & quadrant
+        if (empty & quadrant).bit_count() % 2 == 1:
+            moves = oddMoves
+        else:
+            moves = evenMoves
+        while quadrantMoves:
+            move = quadrantMoves & -quadrantMoves
+            moves.append(move)
+            quadrantMoves ^= move
+    return oddMoves + evenMoves
+
+
+def order_endgame_moves(own, opp, moveMask):
+    '''order_endgame_moves(own,opp,moveMask) -> list
+    returns the single-bit moves in moveMask in the order the endgame
+      solver should try them: moves that leave the opponent the fewest
+      replies first (fastest first), odd quadrants first among equals'''
+    empty = ~(own | opp) & FULL_MASK
+    scoredMoves = []
+    for order, move in enumerate(parity_order(empty, moveMask)):
+        flips = flip_mask(own, opp, move)
+        # opponent's mobility after the move
+        replies = legal_move_mask(opp & ~flips, own | flips | move).bit_count()
+        scoredMoves.append((replies, order, move))
+    scoredMoves.sort()
+    return [move for replies, order, move in scoredMoves]
+
+
+class Evaluator(abc.ABC):
+    '''scores positions for ReversiBoard.minimax
+    subclasses must define evaluate, and may override evaluate_batch to
+      score many positions faster than one at a time'''
+
+    @abc.abstractmethod
+    def evaluate(self, own, opp):
+        '''Evaluator.evaluate(own,opp) -> number
+        returns how good the position is for the player with pieces own
+          against the player with pieces opp'''
+
+    def evaluate_batch(self, positions):
+        '''Evaluator.evaluate_batch(positions) -> list
+        returns the score of each (own,opp) pair in positions'''
+        return [self.evaluate(own, opp) for own, opp in positions]
+
+
+class WeightedPatternEvaluator(Evaluator):
+    '''scores positions by square values, mobility, stable pieces and disc count'''
+
+    def __init__(self, squareValues=SQUARE_VALUES, mobilityWeight=5,
+                 stabilityWeight=10, discWeight=1):
+        '''WeightedPatternEvaluator([squareValues,mobilityWeight,stabilityWeight,discWeight])
+        the score is the difference between the two players in
+          the total of squareValues of their pieces
+          + mobilityWeight * number of legal moves
+          + stabilityWeight * number of stable pieces (see stable_edge_mask)
+          + discWeight * number of pieces'''
+        self.squareValues = squareValues
+        self.mobilityWeight = mobilityWeight
+        self.stabilityWeight = stabilityWeight
+        self.discWeight = discWeight
+        # rowTables[row][pattern] is the total value of the pieces in a row
+        #   whose 8 bits are pattern, so a board is scored in 8 lookups
+        self.rowTables = []
+        for row in range(8):
+            table = []
+            for pattern in range(256):
+                table.append(sum(squareValues[row][column] for column in range(8)
+                                 if pattern >> column & 1))
+            self.rowTables.append(table)
+
+    def square_total(self, pieces):
+        '''WeightedPatternEvaluator.square_total(pieces) -> int
+        returns the total of the square values of pieces'''
+        total = 0
+        for row in range(8):
+            total += self.rowTables[row][(pieces >> (8 * row)) & 0xff]
+        return total
+
+    def evaluate(self, own, opp):
+        '''WeightedPatternEvaluator.evaluate(own,opp) -> int
+        returns how good the position is for own'''
+        score = self.square_total(own) - self.square_total(opp)
+        score += self.mobilityWeight * (legal_move_mask(own, opp).bit_count() -
+                                        legal_move_mask(opp, own).bit_count())
+        score += self.stabilityWeight * (stable_edge_mask(own).bit_count() -
+                                         stable_edge_mask(opp).bit_count())
+        score += self.discWeight * (own.bit_count() - opp.bit_count())
+        return score
+
+
+class NumpyPatternEvaluator(WeightedPatternEvaluator):
+    '''WeightedPatternEvaluator that scores batches of positions with numpy'''
+
+    def __init__(self, *args, **kwargs):
+        '''NumpyPatternEvaluator([squareValues,mobilityWeight,stabilityWeight,discWeight])
+        same scores as WeightedPatternEvaluator (needs numpy)'''
+        if numpy is None:
+            raise ImportError('NumpyPatternEvaluator needs numpy')
+        WeightedPatternEvaluator.__init__(self, *args, **kwargs)
+        self.weights = numpy.array(self.squareValues, dtype=numpy.int64).reshape(64)
+
+    def bits(self, boards):
+        '''NumpyPatternEvaluator.bits(boards) -> numpy.ndarray
+        returns an (n,64) array of 0s and 1s for an array of n bitboards'''
+        asBytes = boards.astype('<u8').view(numpy.uint8).reshape(-1, 8)
+        return numpy.unpackbits(asBytes, axis=1, bitorder='little')
+
+    def count(self, boards):
+        '''NumpyPatternEvaluator.count(boards) -> numpy.ndarray
+        returns the number of pieces in each of an array of bitboards'''
+        return self.bits(boards).sum(axis=1, dtype=numpy.int64)
+
+    def evaluate_batch(self, positions):
+        '''NumpyPatternEvaluator.evaluate_batch(positions) -> list
+        returns the score of each (own,opp) pair in positions
+        every feature is computed for all the positions at once'''
+        if len(positions) == 0:
+            return []
+        own = numpy.array([position[0] for position in positions], dtype=numpy.uint64)
+        opp = numpy.array([position[1] for position in positions], dtype=numpy.uint64)
+        # the bitboard functions work on arrays of uint64 too
+        scores = (self.bits(own).astype(numpy.int64) -
+                  self.bits(opp).astype(numpy.int64)) @ self.weights
+        scores += self.mobilityWeight * (self.count(legal_move_mask(own, opp)) -
+                                         self.count(legal_move_mask(opp, own)))
+        scores += self.stabilityWeight * (self.count(stable_edge_mask(own)) -
+                                          self.count(stable_edge_mask(opp)))
+        scores += self.discWeight * (self.count(own) - self.count(opp))
+        return scores.tolist()
+
+
+class BitboardView:
+    '''dict-like view of a ReversiBoard's bitboards
+    keys are (row,column) tuples, values are 0, 1 or None (empty)'''
+
+    def __init__(self, reversiBoard):
+        '''BitboardView(reversiBoard)
+        creates a view of the pieces on reversiBoard'''
+        self.reversiBoard = reversiBoard
+
+    def __getitem__(self, coords):
+        '''BitboardView[coords] -> int or None
+        returns the piece at coords'''
+        return self.reversiBoard.get_piece(coords)
+
+    def __setitem__(self, coords, piece):
+        '''BitboardView[coords] = piece
+        puts piece (0, 1 or None) on the square coords'''
+        reversiBoard = self.reversiBoard
+        bit = square_mask(coords)
+        square = 8 * coords[0] + coords[1]
+        for player in range(2):  # clear the square for both players
+            if reversiBoard.bitboards[player] & bit:
+                reversiBoard.bitboards[player] &= ~bit
+                reversiBoard.hashKey ^= PIECE_KEYS[player][square]
+        if piece is not None:
+            reversiBoard.bitboards[piece] |= bit
+            reversiBoard.hashKey ^= PIECE_KEYS[piece][square]
+
+    def __iter__(self):
+        '''iterates over all 64 (row,column) squares'''
+        for row in range(8):
+            for column in range(8):
+                yield (row, column)
+
+    def __len__(self):
+        return 64
+
+    def __contains__(self, coords):
+        return coords in self.keys()
+
+    def keys(self):
+        '''BitboardView.keys() -> list
+        returns all the (row,column) squares'''
+        return list(self)
+
+    def values(self):
+        '''BitboardView.values() -> list
+        returns the pieces on all the squares, in row-major order'''
+        return [self[coords] for coords in self]
+
+    def items(self):
+        '''BitboardView.items() -> list
+        returns (square,piece) pairs for all the squares'''
+        return [(coords, self[coords]) for coords in self]
 
 
 class ReversiBoard:
@@ -8,24 +351,74 @@ class ReversiBoard:
     def __init__(self):
         '''ReversiBoard()
         creates a ReversiBoard in starting position'''
-        self.board = {}  # dict to store position
-        # create opening position
-        for row in range(8):
-            for column in range(8):
-                coords = (row, column)
-                if coords in [(3, 3), (4, 4)]:
-                    self.board[coords] = 1  # player 1
-                elif coords in [(3, 4), (4, 3)]:
-                    self.board[coords] = 0  # player 0
-                else:
-                    self.board[coords] = None  # empty
+        # bitboards of player 0's and player 1's pieces
+        #   opening position has (3,4),(4,3) for player 0
+        #   and (3,3),(4,4) for player 1
+        self.bitboards = [square_mask((3, 4)) | square_mask((4, 3)),
+                          square_mask((3, 3)) | square_mask((4, 4))]
         self.currentPlayer = 0
         self.endgame = None  # replace with string when game ends
+        # Zobrist hash of the pieces and current player
+        #   kept up to date as pieces are placed and flipped
+        self.hashKey = zobrist_hash(self.bitboards, self.currentPlayer)
+        # legal move bitboards for each player, for the position with
+        #   (piece-only) hash self.legalMovesKey
+        self.legalMovesKey = None
+        self.legalMoves = [None, None]
+        # (square bit, flipped pieces, previous hash) for each make_move
+        self.undoStack = []
+        self.nodes = 0  # number of positions searched
+        # computer_turn switches to the exact endgame solver at this many empties
+        self.endgameEmpties = ENDGAME_EMPTIES
+        # computer_turn plays moves from this book (see reversi_book.py) if set
+        self.openingBook = None
+        # iterative_deepening splits each depth's root moves across this
+        #   ParallelSearch's processes if set
+        self.parallelSearch = None
+        # searches stop (as if out of time) once this threading.Event is set
+        self.stopEvent = None
+        self.searchDepth = 0  # depth reached by the last search
+        # how choose_move picked its move: 'book', 'exact' (endgame
+        #   solver), 'search' or 'pass' (no legal moves)
+        self.searchMode = 'search'
+        # moves played with try_move and pass_turn (None = pass)
+        self.moveHistory = []
+
+    @property
+    def board(self):
+        '''ReversiBoard.board -> BitboardView
+        dict-like view of the position, keyed by (row,column)'''
+        return BitboardView(self)
+
+    @board.setter
+    def board(self, position):
+        '''ReversiBoard.board = position
+        loads the position from a dict (or view) keyed by (row,column)'''
+        if isinstance(position, BitboardView):  # copy bitboards directly
+            self.bitboards = list(position.reversiBoard.bitboards)
+        else:
+            self.bitboards = [0, 0]
+            for coords, piece in position.items():
+                if piece is not None:
+                    self.bitboards[piece] |= square_mask(coords)
+        self.hashKey = zobrist_hash(self.bitboards, self.currentPlayer)
+
+    def pieces_key(self):
+        '''ReversiBoard.pieces_key() -> int
+        returns the hash of the pieces alone (whoever is to move)'''
+        if self.currentPlayer == 1:
+            return self.hashKey ^ PLAYER_KEY
+        return self.hashKey
 
     def get_piece(self, coords):
         '''ReversiBoard.get_piece(coords) -> int
         returns the piece at coords'''
-        return self.board[coords]
+        bit = square_mask(coords)
+        if self.bitboards[0] & bit:
+            return 0
+        if self.bitboards[1] & bit:
+            return 1
+        return None
 
     def get_endgame(self):
         '''ReversiBoard.get_endgame() -> None or str
@@ -41,13 +434,23 @@ class ReversiBoard:
         '''ReversiBoard.next_player()
         advances to next player'''
         self.currentPlayer = 1 - self.currentPlayer
+        self.hashKey ^= PLAYER_KEY
+
+    def pass_turn(self):
+        '''ReversiBoard.pass_turn()
+        the current player passes (recorded in the move history)'''
+        self.moveHistory.append(None)
+        self.next_player()
+
+    def get_move_history(self):
+        '''ReversiBoard.get_move_history() -> list
+        returns the moves played so far, None for a pass'''
+        return list(self.moveHistory)
 
     def get_scores(self):
         '''ReversiBoard.get_scores() -> tuple
         returns a tuple containing player 0's and player 1's scores'''
-        pieces = list(self.board.values())  # list of all the pieces
-        # count the number of pieces belonging to both players
-        return pieces.count(0), pieces.count(1)
+        return self.bitboards[0].bit_count(), self.bitboards[1].bit_count()
 
     def flip_pieces(self, coords, checkingOnly=False):
         '''ReversiBoard.flip_pieces(coords[checkingOnly]) -> int
@@ -57,116 +460,227 @@ class ReversiBoard:
         # get player colors
         thisPlayer = self.currentPlayer
         otherPlayer = 1 - thisPlayer
-        flipped = 0  # counts flipped pieces
-        # loop over the 8 possible directions
-        for dr in [-1, 0, 1]:
-            for dc in [-1, 0, 1]:
-                if dr == 0 and dc == 0:  # non-direction
-                    continue
-                # look at the first square in the given direction
-                (row, col) = (coords[0] + dr, coords[1] + dc)
-                counter = 0  # keep track of how many squares have a
-                # piece of the opposite color
-                # keep looking as long as we have pieces of the opposite
-                #   color and we're still on the board
-                while (0 <= row < 8) and (0 <= col < 8) and \
-                        self.board[(row, col)] == otherPlayer:
-                    (row, col) = (row + dr, col + dc)  # continue moving in this direction
-                    counter += 1  # increment the count of number of stones flipped
-                # the next stone must be of the current player's color
-                #  (and still on the board)
-                if (0 <= row < 8) and (0 <= col < 8) and \
-                        self.board[(row, col)] == thisPlayer:
-                    # this direction will get flipped
-                    flipped += counter  # update the overall flipped counter
-                    if not checkingOnly:  # if not just checking, flip them!
-                        for i in range(1, counter + 1):
-                            self.board[(coords[0] + i * dr, coords[1] + i * dc)] = thisPlayer
-        return flipped
+        flips = flip_mask(self.bitboards[thisPlayer],
+                          self.bitboards[otherPlayer], square_mask(coords))
+        if not checkingOnly:  # if not just checking, flip them!
+            self.bitboards[thisPlayer] |= flips
+            self.bitboards[otherPlayer] &= ~flips
+            self.hashKey ^= flip_keys(flips)
+        return flips.bit_count()
+
+    def get_legal_move_mask(self, player=None):
+        '''ReversiBoard.get_legal_move_mask([player]) -> int
+        returns the bitboard of player's legal moves
+          (defaults to the current player)
+        results are cached until the pieces change, so the display,
+          check_endgame and the Pass button don't regenerate them'''
+        if player is None:
+            player = self.currentPlayer
+        piecesKey = self.pieces_key()  # same pieces, either player to move
+        if piecesKey != self.legalMovesKey:  # pieces changed
+            self.legalMovesKey = piecesKey
+            self.legalMoves = [None, None]
+        moves = self.legalMoves[player]
+        if moves is None:
+            moves = legal_move_mask(self.bitboards[player],
+                                    self.bitboards[1 - player])
+            self.legalMoves[player] = moves
+        return moves
 
     def get_legal_moves(self):
         '''ReversiBoard.get_legal_moves() -> list
         returns a list of the current player's legal moves'''
-        moves = []  # place legal moves here
-        for row in range(8):  # check each square
-            for column in range(8):
-                coords = (row, column)
-                # if space is empty and would flip pieces
-                if self.board[coords] is None and \
-                        self.flip_pieces(coords, checkingOnly=True) > 0:
-                    moves.append(coords)  # add to list
-        return moves
+        return mask_to_coords(self.get_legal_move_mask())
 
     def try_move(self, coords):
-        '''ReversiBoard.try_move(coords)
+        '''ReversiBoard.try_move(coords) -> set
         places the current player's piece in the given square if the
           square is empty and the move is legal
-        also flips necessary pieces and goes to other player's turn'''
-        if self.board[coords] is not None:  # if square occupied
-            return False  # move not valid
-        # flip any pieces and check how many got flipped
-        numFlipped = self.flip_pieces(coords)
-        if numFlipped > 0:  # if any pieces flipped
-            # set the current square to the current player's color
-            self.board[coords] = self.currentPlayer
-            self.next_player()  # next player's turn
-            self.check_endgame()  # check if game over
-        return numFlipped > 0  # tell ReversiGame if move was valid
+        also flips necessary pieces and goes to other player's turn
+        returns the set of squares that changed (the new piece and the
+          flipped ones), which is empty (False) if the move isn't valid'''
+        bit = square_mask(coords)
+        if (self.bitboards[0] | self.bitboards[1]) & bit:  # if square occupied
+            return set()  # move not valid
+        # find the pieces that get flipped
+        thisPlayer = self.currentPlayer
+        flips = flip_mask(self.bitboards[thisPlayer],
+                          self.bitboards[1 - thisPlayer], bit)
+        if flips == 0:  # move must flip something
+            return set()
+        # flip them and set the current square to the current player's color
+        self.bitboards[thisPlayer] |= flips | bit
+        self.bitboards[1 - thisPlayer] &= ~flips
+        self.hashKey ^= flip_keys(flips) ^ \
+            PIECE_KEYS[thisPlayer][8 * coords[0] + coords[1]]
+        self.moveHistory.append(coords)
+        self.next_player()  # next player's turn
+        self.check_endgame()  # check if game over
+        return set(mask_to_coords(flips | bit))  # tell ReversiGame what changed
+
+    def make_move(self, coords):
+        '''ReversiBoard.make_move(coords) -> bool
+        plays the current player's piece at coords in place and records it
+          on the undo stack so undo_move can take it back
+        coords None is a pass
+        unlike try_move, doesn't check for the end of the game
+        returns False (and changes nothing) if the move is illegal'''
+        thisPlayer = self.currentPlayer
+        if coords is None:  # pass
+            bit = flips = 0
+        else:
+            bit = square_mask(coords)
+            if (self.bitboards[0] | self.bitboards[1]) & bit:  # occupied
+                return False
+            flips = flip_mask(self.bitboards[thisPlayer],
+                              self.bitboards[1 - thisPlayer], bit)
+            if flips == 0:
+                return False
+        self.undoStack.append((bit, flips, self.hashKey))
+        if bit:
+            self.bitboards[thisPlayer] |= bit | flips
+            self.bitboards[1 - thisPlayer] &= ~flips
+            self.hashKey ^= PIECE_KEYS[thisPlayer][bit.bit_length() - 1] ^ \
+                flip_keys(flips)
+        self.next_player()
+        return True
+
+    def undo_move(self):
+        '''ReversiBoard.undo_move()
+        takes back the last move made with make_move'''
+        bit, flips, hashKey = self.undoStack.pop()
+        self.currentPlayer = 1 - self.currentPlayer  # player who moved
+        self.bitboards[self.currentPlayer] &= ~(bit | flips)
+        self.bitboards[1 - self.currentPlayer] |= flips
+        self.hashKey = hashKey
 
     def evaluate_coordinate(self, coords):
         '''ReversiBoard.evaluate_coordinate(coords) -> int
         returns the value of the (row,column) tuple coords'''
-        coordValues = ((99, -8, 8, 6, 6, 8, -8, 99),
-                       (-8, -24, -4, -3, -3, -4, -24, -8),
-                       (8, -4, 7, 4, 4, 7, -4, 8),
-                       (6, -3, 4, 0, 0, 4, -3, 6),
-                       (6, -3, 4, 0, 0, 4, -3, 6),
-                       (8, -4, 7, 4, 4, 7, -4, 8),
-                       (-8, -24, -4, -3, -3, -4, -24, -8),
-                       (99, -8, 8, 6, 6, 8, -8, 99))
         row, column = coords  # unpack coordinates
-        return coordValues[row][column]
+        return SQUARE_VALUES[row][column]
 
-    def computer_turn(self):
-        '''ReversiBoard.computer_turn()
-        pick a good move'''
-        legalMoves = self.get_legal_moves()
-        if len(legalMoves) == 0:  # if no moves
-            self.next_player()  # player passes
+    def computer_turn(self, time_limit=None):
+        '''ReversiBoard.computer_turn([time_limit])
+        pick a good move
+          time_limit is the number of seconds to search for
+          (None looks 1 move ahead)
+        once self.endgameEmpties or fewer squares are empty, the game is
+          solved exactly instead, if the solver finishes in half of
+          time_limit (ENDGAME_TIME_LIMIT without one); otherwise the
+          usual search picks the move
+        positions in self.openingBook are played without searching'''
+        move = self.choose_move(time_limit)
+        if move is None:  # if no moves
+            self.pass_turn()  # player passes
         else:
-            value, move = self.minimax(1)  # look 4 moves ahead
             self.try_move(move)
 
+    def choose_move(self, time_limit=None):
+        '''ReversiBoard.choose_move([time_limit]) -> coords
+        returns the move computer_turn would make, without making it
+          (None if the current player has to pass)'''
+        legalMoves = self.get_legal_moves()
+        self.searchDepth = 0
+        if len(legalMoves) == 0:  # if no moves
+            self.searchMode = 'pass'
+            return None
+        move = None
+        if self.openingBook is not None:  # try the book first
+            move = self.openingBook.lookup(self)  # None if not in book
+            self.searchMode = 'book'
+        if move is None:
+            empties = 64 - sum(self.get_scores())
+            self.searchMode = 'search'
+            if empties <= self.endgameEmpties:
+                self.searchMode = 'exact'
+                startTime = time.perf_counter()
+                if time_limit is None:
+                    solveTime = ENDGAME_TIME_LIMIT
+                else:
+                    solveTime = time_limit / 2
+                try:  # play perfectly if there's time
+                    value, move = self.solve_endgame(deadline=startTime + solveTime)
+                    self.searchDepth = empties
+                except SearchTimeout:  # search normally instead
+                    self.searchMode = 'search'
+                    if time_limit is None:
+                        value, move = self.minimax(1)
+                        self.searchDepth = 1
+                    else:  # with the time left
+                        timeLeft = time_limit - (time.perf_counter() - startTime)
+                        value, move = self.iterative_deepening(max(timeLeft, 0))
+            elif time_limit is None:
+                value, move = self.minimax(1)  # look 1 move ahead
+                self.searchDepth = 1
+            else:  # search as deep as time allows
+                value, move = self.iterative_deepening(time_limit)
+        return move
+
+    def copy(self):
+        '''ReversiBoard.copy() -> ReversiBoard
+        returns a copy of self (sharing the opening book and parallel search)'''
+        newBoard = ReversiBoard()
+        newBoard.bitboards = list(self.bitboards)
+        newBoard.currentPlayer = self.get_player()
+        newBoard.hashKey = self.hashKey
+        newBoard.endgame = self.get_endgame()
+        newBoard.endgameEmpties = self.endgameEmpties
+        newBoard.openingBook = self.openingBook
+        newBoard.parallelSearch = self.parallelSearch
+        newBoard.moveHistory = list(self.moveHistory)
+        return newBoard
+
     def branch(self, move):
         '''ReversiBoard.branch(move) -> ReversiBoard
         returns a copy of self
         has the copy make the given move'''
-        newBoard = ReversiBoard()
-        # copy self
-        newBoard.board = dict(self.board)
-        newBoard.currentPlayer = self.get_player()
-        newBoard.endgame = self.get_endgame()
+        newBoard = self.copy()
         newBoard.try_move(move)  # make move
         return newBoard
 
-    def minimax(self, depth=1):
-        '''ReversiBoard.minimax(depth) -> value,coords
+    def minimax(self, depth=1, evaluator=None):
+        '''ReversiBoard.minimax(depth[,evaluator]) -> value,coords
         performs minimax algorithm with depth
         returns the value of the move and best move
-        pass is considered a move of value 0'''
+        pass is considered a move of value 0
+          evaluator is an Evaluator to score the positions depth moves
+          ahead; by default each move is worth its evaluate_coordinate
+          value minus the opponent's reply
+          with an evaluator, a pass is scored like a leaf position'''
+        self.nodes += 1
         legalMoves = self.get_legal_moves()
+        thisPlayer = self.currentPlayer
         if len(legalMoves) == 0:  # if forced to pass
+            if evaluator is not None:  # score the position as it stands
+                return evaluator.evaluate(self.bitboards[thisPlayer],
+                                          self.bitboards[1 - thisPlayer]), None
             return 0, None  # value 0, None = pass
-        bestMoveValue = -999  # initialize best move tracking variable
-        for move in legalMoves:
-            moveValue = self.evaluate_coordinate(move)
+        if evaluator is not None and depth <= 1:
+            # score all the resulting positions in one batch
+            own = self.bitboards[thisPlayer]
+            opp = self.bitboards[1 - thisPlayer]
+            positions = []
+            for move in legalMoves:
+                bit = square_mask(move)
+                flips = flip_mask(own, opp, bit)
+                positions.append((own | bit | flips, opp & ~flips))
+            moveValues = evaluator.evaluate_batch(positions)
+        bestMoveValue = None  # initialize best move tracking variable
+        for i, move in enumerate(legalMoves):
+            if evaluator is None:
+                moveValue = self.evaluate_coordinate(move)
+            elif depth <= 1:
+                moveValue = moveValues[i]
+            else:  # value comes from the opponent's reply alone
+                moveValue = 0
             if depth > 1:  # if want to look more than 1 move ahead
-                # create new board with this move
-                newBoard = self.branch(move)
+                self.make_move(move)  # make the move in place
                 # opponent takes their most valuable move
-                oppValue, oppMove = newBoard.minimax(depth - 1)
+                oppValue, oppMove = self.minimax(depth - 1, evaluator)
+                self.undo_move()
                 moveValue -= oppValue  # subtract opponent's move value
-            if moveValue > bestMoveValue:  # if better move
+            if bestMoveValue is None or moveValue > bestMoveValue:  # if better move
                 bestMoves = [move]  # start new list
                 bestMoveValue = moveValue  # update tracking variables
             elif moveValue == bestMoveValue:  # just as good
@@ -174,23 +688,290 @@ class ReversiBoard:
         # pick a "best" move at random
         return bestMoveValue, random.choice(bestMoves)
 
+    def order_moves(self, moves, firstMove=None):
+        '''ReversiBoard.order_moves(moves[,firstMove]) -> list
+        returns moves sorted from most to least valuable square
+          (corners first), with firstMove moved to the front'''
+        orderedMoves = sorted(moves, key=self.evaluate_coordinate, reverse=True)
+        if firstMove in orderedMoves:
+            orderedMoves.remove(firstMove)
+            orderedMoves.insert(0, firstMove)
+        return orderedMoves
+
+    def alphabeta(self, depth=1, alpha=-999999, beta=999999, deadline=None,
+                  firstMove=None, table=None):
+        '''ReversiBoard.alphabeta(depth[,alpha,beta,deadline,firstMove,table]) -> value,coords
+        performs minimax with alpha-beta pruning to depth
+        returns the same value as minimax(depth) if it is between alpha and beta
+          deadline is a time.perf_counter() value; raises SearchTimeout
+          if the search is still running after it
+          firstMove is searched first (usually the best move from a
+          shallower search)
+          table is a TranspositionTable for reusing results of positions
+          reached by different move orders'''
+        if deadline is not None and time.perf_counter() > deadline:
+            raise SearchTimeout
+        if self.stopEvent is not None and self.stopEvent.is_set():
+            raise SearchTimeout  # search was cancelled
+        self.nodes += 1
+        alphaOrig = alpha
+        if table is not None:
+            entry = table.lookup(self.hashKey)
+            if entry is not None:
+                key, entryDepth, entryValue, bound, entryMove = entry
+                # only reuse values from the same depth, so the result
+                #   still matches minimax(depth)
+                if entryDepth == depth and (bound == EXACT or
+                                            (bound == LOWER_BOUND and entryValue >= beta) or
+                                            (bound == UPPER_BOUND and entryValue <= alpha)):
+                    return entryValue, entryMove
+                if firstMove is None:  # try the stored best move first
+                    firstMove = entryMove
+        legalMoves = self.get_legal_moves()
+        if len(legalMoves) == 0:  # if forced to pass
+            return 0, None  # value 0, None = pass
+        bestMoveValue = -999999  # initialize best move tracking variables
+        bestMove = None
+        for move in self.order_moves(legalMoves, firstMove):
+            moveValue = self.evaluate_coordinate(move)
+            if depth > 1:  # if want to look more than 1 move ahead
+                self.make_move(move)
+                try:
+                    # opponent takes their most valuable move
+                    #   our value is moveValue - oppValue, so our window
+                    #   (alpha,beta) is their window (moveValue-beta,moveValue-alpha)
+                    oppValue, oppMove = self.alphabeta(depth - 1, moveValue - beta,
+                                                       moveValue - alpha, deadline,
+                                                       table=table)
+                finally:  # put the board back even if time ran out
+                    self.undo_move()
+                moveValue -= oppValue  # subtract opponent's move value
+            if moveValue > bestMoveValue:  # if better move
+                bestMoveValue = moveValue
+                bestMove = move
+                alpha = max(alpha, moveValue)
+                if alpha >= beta:  # opponent won't allow this line
+                    break
+        if table is not None:
+            if bestMoveValue <= alphaOrig:  # real value may be lower
+                bound = UPPER_BOUND
+            elif bestMoveValue >= beta:  # real value may be higher
+                bound = LOWER_BOUND
+            else:
+                bound = EXACT
+            table.store(self.hashKey, depth, bestMoveValue, bound, bestMove)
+        return bestMoveValue, bestMove
+
+    def solve_endgame(self, alpha=-64, beta=64, deadline=None):
+        '''ReversiBoard.solve_endgame([alpha,beta,deadline]) -> score,coords
+        searches to the end of the game
+        returns the final disc differential (current player's pieces minus
+          the other player's) with best play from both sides, and the move
+          that gets it (None = pass)
+        the score is exact if it is between alpha and beta
+          deadline is a time.perf_counter() value; raises SearchTimeout
+          if the solver is still running after it'''
+        own = self.bitboards[self.currentPlayer]
+        opp = self.bitboards[1 - self.currentPlayer]
+        moveMask = legal_move_mask(own, opp)
+        if moveMask == 0:  # pass (or game over)
+            self.nodes += 1
+            return self.solve_bitboards(own, opp, alpha, beta, deadline=deadline), None
+        bestScore = -65
+        bestMove = None
+        for move in order_endgame_moves(own, opp, moveMask):
+            flips = flip_mask(own, opp, move)
+            score = -self.solve_bitboards(opp & ~flips, own | flips | move,
+                                          -beta, -alpha, deadline=deadline)
+            if score > bestScore:
+                bestScore = score
+                bestMove = mask_to_coords(move)[0]
+                alpha = max(alpha, score)
+                if alpha >= beta:  # opponent won't allow this line
+                    break
+        return bestScore, bestMove
+
+    def solve_bitboards(self, own, opp, alpha, beta, passed=False, deadline=None):
+        '''ReversiBoard.solve_bitboards(own,opp,alpha,beta[,passed,deadline]) -> int
+        returns the final disc differential for the player to move with
+          pieces own against pieces opp (see solve_endgame)
+        works on the bitboards directly so the board itself isn't touched
+          passed is True if the other player just passed
+        raises SearchTimeout if self.stopEvent is set or deadline passes'''
+        self.nodes += 1
+        if self.stopEvent is not None and self.stopEvent.is_set():
+            raise SearchTimeout  # search was cancelled
+        # the clock is only read every 1024 nodes, it costs more than a node
+        if deadline is not None and self.nodes & 1023 == 0 and \
+                time.perf_counter() > deadline:
+            raise SearchTimeout
+        empty = ~(own | opp) & FULL_MASK
+        if empty & (empty - 1) == 0 and empty:  # one empty square left
+            flips = flip_mask(own, opp, empty)
+            if flips:
+                return own.bit_count() - opp.bit_count() + 2 * flips.bit_count() + 1
+            flips = flip_mask(opp, own, empty)
+            if flips:
+                return own.bit_count() - opp.bit_count() - 2 * flips.bit_count() - 1
+            return own.bit_count() - opp.bit_count()
+        moveMask = legal_move_mask(own, opp)
+        if moveMask == 0:
+            if passed:  # neither player can move: game over
+                return own.bit_count() - opp.bit_count()
+            return -self.solve_bitboards(opp, own, -beta, -alpha, True, deadline)
+        bestScore = -65
+        if empty.bit_count() > ENDGAME_FASTEST_FIRST:
+            moves = order_endgame_moves(own, opp, moveMask)
+        else:  # ordering isn't worth its cost this close to the end
+            moves = parity_order(empty, moveMask)
+        for move in moves:
+            flips = flip_mask(own, opp, move)
+            score = -self.solve_bitboards(opp & ~flips, own | flips | move,
+                                          -beta, -alpha, deadline=deadline)
+            if score > bestScore:
+                bestScore = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:  # opponent won't allow this line
+                        break
+        return bestScore
+
+    def iterative_deepening(self, time_limit, maxDepth=None, table=None):
+        '''ReversiBoard.iterative_deepening(time_limit[,maxDepth,table]) -> value,coords
+        runs alphabeta at depth 1, 2, 3, ... until time_limit seconds pass
+          or maxDepth (default: number of empty squares) is reached
+        returns the result of the deepest completed search
+        the depth reached is stored in self.searchDepth
+          table is the TranspositionTable to use (a new one by default)
+        each depth is searched with self.parallelSearch, if set'''
+        if maxDepth is None:
+            maxDepth = max(1, 64 - sum(self.get_scores()))
+        search = None
+        if self.parallelSearch is not None:
+            search = lambda depth, **options: self.parallelSearch.search(self, depth, **options)
+        return game_search.iterative_deepening(self, time_limit, maxDepth, table,
+                                               search=search)
+
     def check_endgame(self):
         '''ReversiBoard.check_endgame()
         checks if game is over
         updates endgameMessage if over'''
-        # if current player has no legal move
-        if len(self.get_legal_moves()) == 0:
-            self.next_player()  # temporarily switch to next player
-            # if other player has no legal move, game is over
-            if len(self.get_legal_moves()) == 0:
-                scores = self.get_scores()
-                if scores[0] > scores[1]:
-                    self.endgame = 0
-                elif scores[0] < scores[1]:
-                    self.endgame = 1
-                else:
-                    endgame = 'draw'
-            self.next_player()  # return to original player
+        # if neither player has a legal move, game is over
+        if self.get_legal_move_mask(0) == 0 and \
+                self.get_legal_move_mask(1) == 0:
+            scores = self.get_scores()
+            if scores[0] > scores[1]:
+                self.endgame = 0
+            elif scores[0] < scores[1]:
+                self.endgame = 1
+            else:
+                self.endgame = 'draw'
+
+
+def board_from_bitboards(bitboards, player):
+    '''board_from_bitboards(bitboards,player) -> ReversiBoard
+    returns a ReversiBoard with the given pieces and player to move'''
+    board = ReversiBoard()
+    board.currentPlayer = player
+    board.bitboards = list(bitboards)
+    board.hashKey = zobrist_hash(board.bitboards, player)
+    return board
+
+
+# best root value found so far by any worker of a ParallelSearch pool
+searchAlpha = None
+
+
+def init_search_worker(sharedAlpha):
+    '''init_search_worker(sharedAlpha)
+    runs in each ParallelSearch worker to share the root alpha value'''
+    global searchAlpha
+    searchAlpha = sharedAlpha
+
+
+def search_root_move(job):
+    '''search_root_move(job) -> value,nodes
+    searches one root move in a ParallelSearch worker
+    job is (bitboards,player,move,depth,deadline)
+    the value is exact if it is at least the shared alpha when the
+      search started, otherwise it is just too low to matter
+      (None if the search ran past deadline)'''
+    bitboards, player, move, depth, deadline = job
+    board = board_from_bitboards(bitboards, player)
+    moveValue = board.evaluate_coordinate(move)
+    # one below alpha, so a move that ties the best so far still gets
+    #   an exact value and ties go to the earlier move like in alphabeta
+    alpha = searchAlpha.value - 1
+    board.make_move(move)
+    try:
+        oppValue, oppMove = board.alphabeta(depth - 1, -999999, moveValue - alpha, deadline)
+    except SearchTimeout:
+        return None, board.nodes
+    moveValue -= oppValue
+    with searchAlpha.get_lock():  # let the other workers prune with it
+        if moveValue > searchAlpha.value:
+            searchAlpha.value = moveValue
+    return moveValue, board.nodes
+
+
+class ParallelSearch:
+    '''process pool that splits a ReversiBoard's root moves between workers'''
+
+    def __init__(self, processes=None):
+        '''ParallelSearch([processes])
+        starts a pool of processes workers (default: one per CPU)'''
+        self.sharedAlpha = multiprocessing.Value('i', 0)
+        self.pool = multiprocessing.Pool(processes, init_search_worker,
+                                         (self.sharedAlpha,))
+        self.nodes = 0  # positions searched by the last search
+
+    def search(self, board, depth=1, deadline=None, firstMove=None, table=None):
+        '''ParallelSearch.search(board[,depth,deadline,firstMove,table]) -> value,coords
+        returns the same value and move as board.alphabeta(depth)
+        the first move (in order_moves order) is searched here to get a
+          good alpha value, then the rest are searched in parallel
+          (young brothers wait), sharing the best value found so far
+          deadline, firstMove and table are used like in alphabeta
+          (the table only for the moves searched here)
+        the workers' nodes are added to board.nodes'''
+        startNodes = board.nodes
+        legalMoves = board.order_moves(board.get_legal_moves(), firstMove)
+        if len(legalMoves) == 0 or depth <= 1:
+            value, move = board.alphabeta(depth, deadline=deadline, table=table)
+            self.nodes = board.nodes - startNodes
+            return value, move
+        # eldest brother
+        bestMove = legalMoves[0]
+        bestMoveValue = board.evaluate_coordinate(bestMove)
+        board.make_move(bestMove)
+        try:
+            oppValue, oppMove = board.alphabeta(depth - 1, deadline=deadline, table=table)
+        finally:
+            board.undo_move()
+        bestMoveValue -= oppValue
+        # younger brothers
+        self.sharedAlpha.value = bestMoveValue
+        jobs = [(tuple(board.bitboards), board.get_player(), move, depth, deadline)
+                for move in legalMoves[1:]]
+        results = self.pool.map(search_root_move, jobs)
+        timedOut = False
+        for move, (moveValue, nodes) in zip(legalMoves[1:], results):
+            board.nodes += nodes
+            if moveValue is None:
+                timedOut = True
+            elif moveValue > bestMoveValue:  # ties go to the earlier move
+                bestMoveValue = moveValue
+                bestMove = move
+        self.nodes = board.nodes - startNodes
+        if timedOut:
+            raise SearchTimeout
+        return bestMoveValue, bestMove
+
+    def close(self):
+        '''ParallelSearch.close()
+        shuts down the worker processes'''
+        self.pool.terminate()
+        self.pool.join()
 
 
 class ReversiSquare(Canvas):
@@ -204,6 +985,7 @@ class ReversiSquare(Canvas):
         self.grid(row=r, column=c)
         # set the attributes
         self.position = (r, c)
+        self.oval = None  # canvas item for the piece, created once
         # bind button click to placing a piece
         self.bind('<Button>', master.get_click)
 
@@ -215,19 +997,28 @@ class ReversiSquare(Canvas):
     def make_color(self, color):
         '''ReversiSquare.make_color(color)
         changes color of piece on square to specified color'''
-        ovalList = self.find_all()  # remove existing piece
-        for oval in ovalList:
-            self.delete(oval)
-        self.create_oval(10, 10, 44, 44, fill=color)
+        if self.oval is None:  # first piece on this square
+            self.oval = self.create_oval(10, 10, 44, 44, fill=color)
+        else:  # reuse the oval
+            self.itemconfig(self.oval, fill=color, state=NORMAL)
+
+    def clear_color(self):
+        '''ReversiSquare.clear_color()
+        removes the piece (if any) from the square'''
+        if self.oval is not None:
+            self.itemconfig(self.oval, state=HIDDEN)
 
 
 class ReversiGame(Frame):
     '''represents a game of Reversi'''
 
-    def __init__(self, master, computerPlayer=None):
-        '''ReversiGame(master,[computerPlayer])
+    def __init__(self, master, computerPlayer=None, timeLimit=None, openingBook=None):
+        '''ReversiGame(master,[computerPlayer,timeLimit,openingBook])
         creates a new Reversi game
-        computerPlayer is the computer player (2-player by default)'''
+        computerPlayer is the computer player (2-player by default)
+        timeLimit is the computer's thinking time per move in seconds
+          (None for a quick 1-move lookahead)
+        openingBook is a reversi_book.OpeningBook for the computer to use'''
         # initialize the Frame
         Frame.__init__(self, master, bg='white')
         self.grid()
@@ -236,6 +1027,7 @@ class ReversiGame(Frame):
         # create the board and squares
         self.board = ReversiBoard()  # board in starting position
         # also sets player 0 to go first
+        self.board.openingBook = openingBook
         self.squares = {}  # stores ReversiSquares
         for row in range(8):
             for column in range(8):
@@ -247,6 +1039,7 @@ class ReversiGame(Frame):
             self.computerPlayer = self.colors.index(computerPlayer)
         else:
             self.computerPlayer = None  # no computer player
+        self.timeLimit = timeLimit
         # set up scoreboard and status markers
         self.rowconfigure(8, minsize=3)  # leave a little space
         self.turnSquares = []  # to store the turn indicator squares
@@ -259,6 +1052,14 @@ class ReversiGame(Frame):
             self.scoreLabels[i].grid(row=9, column=1 + 5 * i)
         self.passButton = Button(self, text='Pass', command=self.pass_move)
         self.passButton.grid(row=9, column=3, columnspan=2)
+        self.endgameLabel = None  # shows who won
+        # status area for the computer's search
+        self.statusLabel = Label(self, text='', font=('Arial', 12))
+        self.statusLabel.grid(row=10, column=0, columnspan=6, sticky=W)
+        Button(self, text='New Game', command=self.restart).grid(row=10, column=6, columnspan=2)
+        # the computer searches in a background thread
+        #   searchStop is the threading.Event that cancels the current search
+        self.searchStop = None
         self.update_display()
 
     def get_click(self, event):
@@ -268,34 +1069,114 @@ class ReversiGame(Frame):
         coords = event.widget.get_position()
         # cannot move during computer's turn
         # calling try_move will make the move if it is valid
-        if self.board.get_player() != self.computerPlayer and \
-                self.board.try_move(coords):
-            self.update_display()  # update the display
+        if self.board.get_player() != self.computerPlayer:
+            changedSquares = self.board.try_move(coords)
+            if changedSquares:  # if the move was valid
+                self.update_display(changedSquares)  # update the display
 
     def pass_move(self):
         '''ReversiFame.pass_move()
         event handler for Pass button
         passes for the player's turn'''
-        self.board.next_player()  # move onto next player
+        self.cancel_search()  # computer can't be thinking about the old position
+        self.board.pass_turn()  # move onto next player
+        self.update_display(set())  # no pieces changed
+
+    def restart(self):
+        '''ReversiGame.restart()
+        event handler for New Game button
+        stops the computer's search and starts over'''
+        self.cancel_search()
+        openingBook = self.board.openingBook
+        self.board = ReversiBoard()
+        self.board.openingBook = openingBook
+        if self.endgameLabel is not None:
+            self.endgameLabel.destroy()
+            self.endgameLabel = None
         self.update_display()
 
     def take_computer_turn(self):
         '''ReversiGame.take_computer_turn()
-        have computer take turn then update display'''
-        self.board.computer_turn()
-        self.update_display()
+        starts the computer's search in a background thread
+        the display stays responsive; check_search picks up the move'''
+        if self.board.get_endgame() is not None or \
+                self.board.get_player() != self.computerPlayer or \
+                self.searchStop is not None:
+            return  # game restarted or already thinking
+        searchBoard = self.board.copy()  # the thread gets its own board
+        self.searchStop = threading.Event()
+        searchBoard.stopEvent = self.searchStop
+        results = queue.Queue()
+        thread = threading.Thread(target=self.run_search,
+                                  args=(searchBoard, self.timeLimit, results),
+                                  daemon=True)
+        thread.start()
+        self.statusLabel['text'] = 'Thinking...'
+        self.after(100, self.check_search, searchBoard, self.searchStop, results)
+
+    def run_search(self, searchBoard, timeLimit, results):
+        '''ReversiGame.run_search(searchBoard,timeLimit,results)
+        runs in the search thread: puts the move chosen for searchBoard
+          into the results queue (doesn't touch any widgets)'''
+        try:
+            results.put(searchBoard.choose_move(timeLimit))
+        except SearchTimeout:  # cancelled before finding a move
+            pass
+
+    def check_search(self, searchBoard, stop, results):
+        '''ReversiGame.check_search(searchBoard,stop,results)
+        polls the search thread: shows its progress, or plays its move
+          once it is done (unless the search was cancelled)'''
+        if stop.is_set():  # cancelled; ignore whatever it finds
+            return
+        try:
+            move = results.get_nowait()
+        except queue.Empty:  # still thinking
+            if searchBoard.searchMode == 'exact':
+                self.statusLabel['text'] = 'Solving... {} nodes'.format(searchBoard.nodes)
+            else:
+                self.statusLabel['text'] = 'Thinking... depth {}, {} nodes'.format(
+                    searchBoard.searchDepth, searchBoard.nodes)
+            self.after(100, self.check_search, searchBoard, stop, results)
+            return
+        self.searchStop = None
+        if searchBoard.searchMode == 'book':
+            self.statusLabel['text'] = 'Book move'
+        elif searchBoard.searchMode == 'pass':
+            self.statusLabel['text'] = 'No moves, so passed'
+        elif searchBoard.searchMode == 'exact':
+            self.statusLabel['text'] = 'Solved to the end, {} nodes'.format(searchBoard.nodes)
+        else:
+            self.statusLabel['text'] = 'Searched depth {}, {} nodes'.format(
+                searchBoard.searchDepth, searchBoard.nodes)
+        if move is None:  # computer passes
+            self.board.pass_turn()
+            self.update_display(set())
+        else:
+            self.update_display(self.board.try_move(move))
 
-    def update_display(self):
-        '''ReversiGame.update_display()
+    def cancel_search(self):
+        '''ReversiGame.cancel_search()
+        stops the computer's search, if it is running'''
+        if self.searchStop is not None:
+            self.searchStop.set()
+            self.searchStop = None
+            self.statusLabel['text'] = ''
+
+    def update_display(self, changedSquares=None):
+        '''ReversiGame.update_display([changedSquares])
         updates squares to match board
-        also updates scoreboard'''
+        also updates scoreboard
+          changedSquares is the set of squares to redraw (all by default)'''
+        if changedSquares is None:
+            changedSquares = self.squares
         # update squares
-        for row in range(8):
-            for column in range(8):
-                rc = (row, column)
-                piece = self.board.get_piece(rc)
-                if piece is not None:
-                    self.squares[rc].make_color(self.colors[piece])
+        for rc in changedSquares:
+            piece = self.board.get_piece(rc)
+            if piece is not None:
+                self.squares[rc].make_color(self.colors[piece])
+            else:
+                self.squares[rc].clear_color()
         # update the turn indicator
         newPlayer = self.board.get_player()
         oldPlayer = 1 - newPlayer
@@ -322,20 +1203,22 @@ class ReversiGame(Frame):
                 endgameMessage = '{} wins!'.format(winner.title())
             else:
                 endgameMessage = "It's a tie!"
-            Label(self, text=endgameMessage, font=('Arial', 18)).grid(row=9, column=2, columnspan=4)
+            self.endgameLabel = Label(self, text=endgameMessage, font=('Arial', 18))
+            self.endgameLabel.grid(row=9, column=2, columnspan=4)
         # if game not over and computer player's turn
         elif self.board.get_player() == self.computerPlayer:
             # wait a second then do turn
             self.after(1000, self.take_computer_turn)
 
 
-def play_reversi(computerPlayer=None):
-    '''play_reversi()
+def play_reversi(computerPlayer=None, timeLimit=None, openingBook=None):
+    '''play_reversi([computerPlayer,timeLimit,openingBook])
     starts a new game of Reversi'''
     root = Tk()
     root.title('Reversi')
-    RG = ReversiGame(root, computerPlayer)
+    RG = ReversiGame(root, computerPlayer, timeLimit, openingBook)
     RG.mainloop()
 
 
-play_reversi('white')
+if __name__ == '__main__':
+    play_reversi('white')
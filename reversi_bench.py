@@ -0,0 +1,83 @@
+'''perft and speed benchmarks for the Reversi engine
+
+run as a script, for example
+  python reversi_bench.py --perft-depth 7 --output bench.jsonl
+to check move generation against known perft counts and time the
+engine; results are printed as JSON (and appended to --output as one
+line per run, so runs from different commits can be compared)'''
+from game_bench import bench_main, rate, sample_positions, time_calls
+from reversi import ReversiBoard, mask_to_coords
+
+# number of leaf positions after depth moves from the starting position
+#   (a pass counts as a move, a finished game counts as a leaf)
+PERFT_REFERENCE = {1: 4, 2: 12, 3: 56, 4: 244, 5: 1396, 6: 8200,
+                   7: 55092, 8: 390216, 9: 3005288}
+
+
+def perft(board, depth):
+    '''perft(board,depth) -> int
+    returns the number of leaf positions depth moves ahead of board'''
+    if depth == 0:
+        return 1
+    moveMask = board.get_legal_move_mask()
+    if moveMask == 0:
+        # game over if the other player can't move either
+        if board.get_legal_move_mask(1 - board.get_player()) == 0:
+            return 1
+        board.make_move(None)  # forced pass
+        nodes = perft(board, depth - 1)
+        board.undo_move()
+        return nodes
+    nodes = 0
+    for move in mask_to_coords(moveMask):
+        board.make_move(move)
+        nodes += perft(board, depth - 1)
+        board.undo_move()
+    return nodes
+
+
+def run_benchmarks(minSeconds=1.0, searchDepth=3, seed=0):
+    '''run_benchmarks([minSeconds,searchDepth,seed]) -> dict
+    times move generation, flipping, branch, minimax and alphabeta
+      on sampled positions
+    returns operations (or search nodes) per second for each'''
+    positions = sample_positions(ReversiBoard, ReversiBoard.try_move, 55, seed=seed)
+    # (board,move) pairs for flip_pieces and branch
+    boardMoves = [(board, move) for board in positions
+                  for move in board.get_legal_moves()]
+    results = {}
+    results['get_legal_moves'] = rate(*time_calls(
+        lambda board: board.get_legal_moves(), positions, minSeconds))
+    results['flip_pieces'] = rate(*time_calls(
+        lambda boardMove: boardMove[0].flip_pieces(boardMove[1], checkingOnly=True),
+        boardMoves, minSeconds))
+    results['branch'] = rate(*time_calls(
+        lambda boardMove: boardMove[0].branch(boardMove[1]), boardMoves, minSeconds))
+
+    def make_undo(boardMove):
+        boardMove[0].make_move(boardMove[1])
+        boardMove[0].undo_move()
+    results['make_undo'] = rate(*time_calls(make_undo, boardMoves, minSeconds))
+    # searches report nodes per second rather than calls per second
+    for name in ('minimax', 'alphabeta'):
+        for board in positions:
+            board.nodes = 0
+        searches, seconds = time_calls(
+            lambda board: getattr(board, name)(searchDepth), positions[:20], minSeconds)
+        nodes = sum(board.nodes for board in positions[:20])
+        results[name] = rate(nodes, seconds)
+        results[name]['depth'] = searchDepth
+        results[name]['searches'] = searches
+    return results
+
+
+def main():
+    '''main()
+    runs perft and the benchmarks and prints the results as JSON
+    exits with status 1 if a perft count doesn't match the reference'''
+    bench_main('Reversi perft and benchmarks.', ReversiBoard, perft, PERFT_REFERENCE,
+               run_benchmarks, 3, 'depth for the minimax/alphabeta benchmarks')
+
+
+if __name__ == '__main__':
+    main()
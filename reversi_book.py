@@ -0,0 +1,208 @@
+'''opening book for the Reversi computer player
+
+the book maps positions from the first moves of the game to the move
+the search picked for them; it is built offline, for example
+  python reversi_book.py reversi.book --games 2000 --plies 12 --depth 5
+and used by passing OpeningBook('reversi.book') to play_reversi
+
+positions are stored once for all 8 symmetries of the board, in an
+open-addressing hash table inside a memory-mapped file, so a lookup
+reads one or two slots and never searches'''
+import argparse
+import mmap
+import random
+import struct
+
+from reversi import FULL_MASK, ReversiBoard, mask_to_coords, square_mask
+
+MAGIC = b'RVBK'
+HEADER = struct.Struct('<4sII')  # magic, number of slots, number of positions
+# slot: player 0's pieces, player 1's pieces, (player to move << 6) | move square
+# an all-zero slot is empty (no real position has no pieces)
+SLOT = struct.Struct('<QQB')
+
+
+def flip_vertical(bits):
+    '''flip_vertical(bits) -> int
+    returns bits with the rows in reverse order'''
+    return int.from_bytes(bits.to_bytes(8, 'little'), 'big')
+
+
+# bytes.translate table that reverses the bits in each byte
+REVERSED_BYTES = bytes(int('{:08b}'.format(i)[::-1], 2) for i in range(256))
+
+
+def mirror_horizontal(bits):
+    '''mirror_horizontal(bits) -> int
+    returns bits with the columns in reverse order'''
+    return int.from_bytes(bits.to_bytes(8, 'little').translate(REVERSED_BYTES), 'little')
+
+
+def flip_diagonal(bits):
+    '''flip_diagonal(bits) -> int
+    returns bits reflected in the (0,0)-(7,7) diagonal (row and column swapped)'''
+    t = 0x0f0f0f0f00000000 & (bits ^ (bits << 28))
+    bits ^= t ^ (t >> 28)
+    t = 0x3333000033330000 & (bits ^ (bits << 14))
+    bits ^= t ^ (t >> 14)
+    t = 0x5500550055005500 & (bits ^ (bits << 7))
+    bits ^= t ^ (t >> 7)
+    return bits & FULL_MASK
+
+
+def transform(bits, symmetry):
+    '''transform(bits,symmetry) -> int
+    applies one of the 8 board symmetries (0-7) to bits
+      bit 2 of symmetry flips the diagonal, bit 1 flips vertically,
+      bit 0 mirrors horizontally (in that order)'''
+    if symmetry & 4:
+        bits = flip_diagonal(bits)
+    if symmetry & 2:
+        bits = flip_vertical(bits)
+    if symmetry & 1:
+        bits = mirror_horizontal(bits)
+    return bits
+
+
+def untransform(bits, symmetry):
+    '''untransform(bits,symmetry) -> int
+    undoes transform(bits,symmetry)'''
+    if symmetry & 1:
+        bits = mirror_horizontal(bits)
+    if symmetry & 2:
+        bits = flip_vertical(bits)
+    if symmetry & 4:
+        bits = flip_diagonal(bits)
+    return bits
+
+
+def canonical(bitboards):
+    '''canonical(bitboards) -> (int,int),int
+    returns the smallest of the 8 symmetric versions of the position
+      and the symmetry that produces it'''
+    best = None
+    for symmetry in range(8):
+        version = (transform(bitboards[0], symmetry), transform(bitboards[1], symmetry))
+        if best is None or version < best:
+            best = version
+            bestSymmetry = symmetry
+    return best, bestSymmetry
+
+
+def slot_index(position, player, numSlots):
+    '''slot_index(position,player,numSlots) -> int
+    returns the first slot to probe for a canonical position
+    (a fixed mix of the bitboards, so it is the same in every run)'''
+    mixed = (position[0] * 0x9e3779b97f4a7c15) ^ \
+        (position[1] * 0xc2b2ae3d27d4eb4f) ^ player
+    mixed = (mixed ^ (mixed >> 29)) & FULL_MASK
+    return mixed % numSlots
+
+
+def write_book(fileName, entries):
+    '''write_book(fileName,entries)
+    writes a book file
+    entries is a dict mapping (canonical position,player) to the canonical
+      move square (0-63)'''
+    # keep the table at most half full so probes stay short
+    numSlots = max(16, 2 * len(entries) + 1)
+    slots = bytearray(numSlots * SLOT.size)
+    for (position, player), square in entries.items():
+        index = slot_index(position, player, numSlots)
+        while any(slots[index * SLOT.size:(index + 1) * SLOT.size]):
+            index = (index + 1) % numSlots  # linear probing
+        SLOT.pack_into(slots, index * SLOT.size, position[0], position[1],
+                       (player << 6) | square)
+    with open(fileName, 'wb') as bookFile:
+        bookFile.write(HEADER.pack(MAGIC, numSlots, len(entries)))
+        bookFile.write(slots)
+
+
+class OpeningBook:
+    '''read-only opening book backed by a memory-mapped file'''
+
+    def __init__(self, fileName):
+        '''OpeningBook(fileName)
+        opens the book file made by write_book'''
+        with open(fileName, 'rb') as bookFile:
+            self.data = mmap.mmap(bookFile.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.numSlots, self.numPositions = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise ValueError(fileName + ' is not a Reversi opening book')
+
+    def __len__(self):
+        return self.numPositions
+
+    def close(self):
+        '''OpeningBook.close()
+        closes the book file'''
+        self.data.close()
+
+    def lookup(self, board):
+        '''OpeningBook.lookup(board) -> (int,int) or None
+        returns the book move for the ReversiBoard board, or None if the
+          position isn't in the book'''
+        position, symmetry = canonical(board.bitboards)
+        player = board.get_player()
+        index = slot_index(position, player, self.numSlots)
+        while True:
+            slotPieces0, slotPieces1, info = SLOT.unpack_from(
+                self.data, HEADER.size + index * SLOT.size)
+            if slotPieces0 == slotPieces1 == 0:  # empty slot: not in book
+                return None
+            if (slotPieces0, slotPieces1) == position and info >> 6 == player:
+                # turn the canonical move back into this board's orientation
+                move = untransform(1 << (info & 63), symmetry)
+                return mask_to_coords(move)[0]
+            index = (index + 1) % self.numSlots
+
+
+def generate_book(games=1000, plies=12, depth=4, explore=0.5, seed=0):
+    '''generate_book([games,plies,depth,explore,seed]) -> dict
+    plays games from the starting position for the first plies moves
+      and records alphabeta(depth)'s move for every position reached
+    each game follows the book move, except with probability explore it
+      plays a random move instead, so the book covers many openings
+    returns entries for write_book'''
+    rng = random.Random(seed)
+    entries = {}
+    for game in range(games):
+        board = ReversiBoard()
+        for ply in range(plies):
+            legalMoves = board.get_legal_moves()
+            if len(legalMoves) == 0:
+                break
+            position, symmetry = canonical(board.bitboards)
+            key = (position, board.get_player())
+            if key not in entries:
+                value, move = board.alphabeta(depth)
+                # store the move in the canonical orientation
+                canonicalMove = transform(square_mask(move), symmetry)
+                entries[key] = canonicalMove.bit_length() - 1
+            if rng.random() < explore:
+                move = rng.choice(legalMoves)
+            else:
+                move = mask_to_coords(untransform(1 << entries[key], symmetry))[0]
+            board.try_move(move)
+    return entries
+
+
+def main():
+    '''main()
+    builds a book file from the command line'''
+    parser = argparse.ArgumentParser(description='Build a Reversi opening book.')
+    parser.add_argument('fileName', help='book file to write')
+    parser.add_argument('--games', type=int, default=1000, help='self-play games')
+    parser.add_argument('--plies', type=int, default=12, help='book moves per game')
+    parser.add_argument('--depth', type=int, default=4, help='alphabeta search depth')
+    parser.add_argument('--explore', type=float, default=0.5,
+                        help='chance of a random move instead of the book move')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    entries = generate_book(args.games, args.plies, args.depth, args.explore, args.seed)
+    write_book(args.fileName, entries)
+    print('wrote {} positions to {}'.format(len(entries), args.fileName))
+
+
+if __name__ == '__main__':
+    main()
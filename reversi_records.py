@@ -0,0 +1,188 @@
+'''Reversi game records
+
+a record file has one game per line, written as its moves with 2
+characters each: the column letter a-h and the row number 1-8 of the
+square (so (0,0) is a1 and (7,7) is h8), or -- for a pass, e.g.
+  d3c3c4c5b4...
+files are read and written one game at a time, so statistics can be
+computed over millions of games without keeping them in memory
+
+run as a script, for example
+  python reversi_records.py games.txt --opening-plies 4
+to print statistics about the games in games.txt as JSON'''
+import argparse
+import collections
+import json
+
+from reversi import flip_mask, legal_move_mask, square_mask
+
+COLUMN_LETTERS = 'abcdefgh'
+PASS = '--'
+# starting pieces for player 0 and player 1, as in ReversiBoard()
+START_BITBOARDS = (square_mask((3, 4)) | square_mask((4, 3)),
+                   square_mask((3, 3)) | square_mask((4, 4)))
+
+
+def encode_move(move):
+    '''encode_move(move) -> str
+    returns the 2-character code for a (row,column) move or None (pass)'''
+    if move is None:
+        return PASS
+    row, column = move
+    return COLUMN_LETTERS[column] + str(row + 1)
+
+
+def decode_move(code):
+    '''decode_move(code) -> (int,int) or None
+    returns the move for a 2-character code
+    raises ValueError if code isn't a square from a1 to h8 or a pass'''
+    if code == PASS:
+        return None
+    if len(code) != 2 or code[0] not in COLUMN_LETTERS or code[1] not in '12345678':
+        raise ValueError('bad move code: ' + repr(code))
+    return (int(code[1]) - 1, COLUMN_LETTERS.index(code[0]))
+
+
+def encode_game(moves):
+    '''encode_game(moves) -> str
+    returns the record line (without newline) for a list of moves'''
+    return ''.join(encode_move(move) for move in moves)
+
+
+def decode_game(line):
+    '''decode_game(line) -> list
+    returns the moves in a record line
+    raises ValueError if the line has an odd length or a bad move code'''
+    line = line.strip()
+    if len(line) % 2:
+        raise ValueError('record has an odd length: ' + repr(line))
+    return [decode_move(line[i:i + 2]) for i in range(0, len(line), 2)]
+
+
+def write_records(fileName, games, append=True):
+    '''write_records(fileName,games[,append]) -> int
+    writes each game (a list of moves) in games to fileName
+      games can be any iterable, including a generator
+    returns the number of games written'''
+    count = 0
+    with open(fileName, 'a' if append else 'w') as recordFile:
+        for moves in games:
+            recordFile.write(encode_game(moves) + '\n')
+            count += 1
+    return count
+
+
+def read_records(fileName):
+    '''read_records(fileName)
+    generator that yields the moves of each game in fileName
+    raises ValueError, with the line number, for a malformed record'''
+    with open(fileName) as recordFile:
+        for lineNumber, line in enumerate(recordFile, 1):
+            if line.strip():
+                try:
+                    moves = decode_game(line)
+                except ValueError as error:
+                    raise ValueError('{} line {}: {}'.format(fileName, lineNumber, error))
+                yield moves
+
+
+def replay_codes(line):
+    '''replay_codes(line) -> (int,int),int
+    plays the moves in a record line from the starting position on
+      bitboards, without building a ReversiBoard
+    returns the final bitboards and the player to move
+    raises ValueError if the line is malformed or a move is illegal'''
+    line = line.strip()
+    if len(line) % 2:
+        raise ValueError('record has an odd length: ' + repr(line))
+    bitboards = list(START_BITBOARDS)
+    player = 0
+    for i in range(0, len(line), 2):
+        code = line[i:i + 2]
+        own = bitboards[player]
+        opp = bitboards[1 - player]
+        if code == PASS:
+            if legal_move_mask(own, opp):
+                raise ValueError('pass with legal moves at move {}'.format(i // 2 + 1))
+        else:
+            row, column = decode_move(code)
+            bit = 1 << (8 * row + column)
+            flips = flip_mask(own, opp, bit) if not (own | opp) & bit else 0
+            if flips == 0:
+                raise ValueError('illegal move {} at move {}'.format(code, i // 2 + 1))
+            bitboards[player] = own | flips | bit
+            bitboards[1 - player] = opp & ~flips
+        player = 1 - player
+    return tuple(bitboards), player
+
+
+def game_result(bitboards):
+    '''game_result(bitboards) -> int or str
+    returns the winner (0 or 1) or 'draw' by the number of pieces'''
+    scores = (bitboards[0].bit_count(), bitboards[1].bit_count())
+    if scores[0] > scores[1]:
+        return 0
+    if scores[0] < scores[1]:
+        return 1
+    return 'draw'
+
+
+def game_statistics(fileName, openingPlies=4, topOpenings=20):
+    '''game_statistics(fileName[,openingPlies,topOpenings]) -> dict
+    replays every game in fileName, one line at a time
+    returns the number of games, player 0's wins/draws/losses, win
+      rates by first move, the most common openings (first openingPlies
+      moves) and the number of records that didn't replay'''
+    games = 0
+    badRecords = 0
+    results = collections.Counter()
+    firstMoves = collections.defaultdict(collections.Counter)
+    openings = collections.Counter()
+    totalMoves = 0
+    with open(fileName) as recordFile:
+        for line in recordFile:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                bitboards, player = replay_codes(line)
+            except ValueError:
+                badRecords += 1
+                continue
+            games += 1
+            totalMoves += len(line) // 2
+            result = game_result(bitboards)
+            results[result] += 1
+            firstMoves[line[:2]][result] += 1
+            openings[line[:2 * openingPlies]] += 1
+    firstMoveStats = {}
+    for firstMove, counts in firstMoves.items():
+        played = sum(counts.values())
+        firstMoveStats[firstMove] = {'games': played,
+                                     'player0WinRate': counts[0] / played,
+                                     'player1WinRate': counts[1] / played,
+                                     'drawRate': counts['draw'] / played}
+    return {'games': games, 'badRecords': badRecords,
+            'player0Wins': results[0], 'player1Wins': results[1],
+            'draws': results['draw'],
+            'averageGameLength': totalMoves / games if games else 0.0,
+            'firstMoves': firstMoveStats,
+            'openings': [{'moves': moves, 'games': count}
+                         for moves, count in openings.most_common(topOpenings)]}
+
+
+def main():
+    '''main()
+    prints statistics for a record file as JSON'''
+    parser = argparse.ArgumentParser(description='Statistics for Reversi game records.')
+    parser.add_argument('fileName', help='record file, one game per line')
+    parser.add_argument('--opening-plies', type=int, default=4,
+                        help='number of moves that make up an opening')
+    parser.add_argument('--top', type=int, default=20,
+                        help='number of most common openings to list')
+    args = parser.parse_args()
+    print(json.dumps(game_statistics(args.fileName, args.opening_plies, args.top), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+'''headless Reversi tournaments between computer players
+
+run as a script, for example
+  python reversi_tournament.py random minimax:2 --games 100
+to play 100 games (alternating colors) and print the results as JSON'''
+import argparse
+import json
+import multiprocessing
+import random
+import time
+
+from reversi import (NumpyPatternEvaluator, ParallelSearch, ReversiBoard,
+                     WeightedPatternEvaluator)
+from reversi_records import encode_game
+
+# the ParallelSearch used by 'parallel' engines (started when first needed)
+parallelSearch = None
+# worker processes for parallelSearch (None: one per CPU)
+parallelProcesses = None
+
+
+def get_parallel_search():
+    '''get_parallel_search() -> ParallelSearch
+    returns the ParallelSearch shared by this process's parallel engines'''
+    global parallelSearch
+    if parallelSearch is None:
+        parallelSearch = ParallelSearch(parallelProcesses)
+    return parallelSearch
+
+
+def make_engine(name):
+    '''make_engine(name) -> function
+    returns a function that takes a ReversiBoard and returns a move for
+      the current player
+    name is one of
+      'random'       -- a random legal move
+      'greedy'       -- the move that flips the most pieces
+      'minimax:k'    -- ReversiBoard.minimax at depth k
+      'alphabeta:k'  -- ReversiBoard.alphabeta at depth k
+      'parallel:k'   -- ParallelSearch at depth k (same moves as alphabeta:k)
+      'pattern:k'    -- minimax at depth k with WeightedPatternEvaluator
+      'numpy:k'      -- minimax at depth k with NumpyPatternEvaluator
+      'time:s'       -- ReversiBoard.iterative_deepening for s seconds'''
+    kind, sep, setting = name.partition(':')
+    if kind == 'random':
+        return lambda board: random.choice(board.get_legal_moves())
+    if kind == 'greedy':
+        return lambda board: max(board.get_legal_moves(),
+                                 key=lambda move: board.flip_pieces(move, checkingOnly=True))
+    if kind == 'minimax':
+        depth = int(setting or 1)
+        return lambda board: board.minimax(depth)[1]
+    if kind == 'alphabeta':
+        depth = int(setting or 1)
+        return lambda board: board.alphabeta(depth)[1]
+    if kind == 'parallel':
+        depth = int(setting or 1)
+        return lambda board: get_parallel_search().search(board, depth)[1]
+    if kind in ('pattern', 'numpy'):
+        depth = int(setting or 1)
+        if kind == 'pattern':
+            evaluator = WeightedPatternEvaluator()
+        else:
+            evaluator = NumpyPatternEvaluator()
+        return lambda board: board.minimax(depth, evaluator)[1]
+    if kind == 'time':
+        timeLimit = float(setting or 1)
+        return lambda board: board.iterative_deepening(timeLimit)[1]
+    raise ValueError('unknown engine: ' + name)
+
+
+def play_game(engineNames, seed):
+    '''play_game(engineNames,seed) -> dict
+    plays one game between the engines named in engineNames
+      engineNames[0] plays player 0 (black), engineNames[1] plays player 1
+    seed seeds the random module, so every game can be replayed
+    returns the winner (0, 1 or 'draw'), scores, number of moves, time taken
+      and the game record (see reversi_records.py)'''
+    random.seed(seed)
+    engines = [make_engine(name) for name in engineNames]
+    board = ReversiBoard()
+    numMoves = 0
+    startTime = time.perf_counter()
+    while board.get_endgame() is None:
+        if board.get_legal_move_mask() == 0:  # forced to pass
+            board.pass_turn()
+            continue
+        move = engines[board.get_player()](board)
+        board.try_move(move)
+        numMoves += 1
+    return {'winner': board.get_endgame(), 'scores': board.get_scores(),
+            'moves': numMoves, 'seconds': time.perf_counter() - startTime,
+            'record': encode_game(board.get_move_history())}
+
+
+def play_game_job(job):
+    '''play_game_job(job) -> dict
+    unpacks a (engineNames,seed) job for Pool.imap_unordered'''
+    return play_game(*job)
+
+
+def run_tournament(engineA, engineB, games=100, seed=0, processes=None,
+                   recordFile=None):
+    '''run_tournament(engineA,engineB[,games,seed,processes,recordFile]) -> dict
+    plays games between engineA and engineB across a process pool
+    engineA plays black in even-numbered games and white in odd ones
+    game i uses seed + i, so results don't depend on how the pool
+      splits up the work
+    returns engineA's wins, draws and losses, the average game length
+      in moves and the overall moves per second
+    if recordFile is given, each game's record is appended to it
+    a 'parallel' engine has its own worker processes, which can't be
+      started from a pool worker, so then the games are played one at a
+      time and processes is the parallel engine's number of workers'''
+    global parallelProcesses
+    jobs = []
+    for i in range(games):
+        if i % 2 == 0:
+            jobs.append(((engineA, engineB), seed + i))
+        else:
+            jobs.append(((engineB, engineA), seed + i))
+    results = {'engines': [engineA, engineB], 'games': games,
+               'wins': 0, 'draws': 0, 'losses': 0}
+    totalMoves = 0
+    totalSeconds = 0
+    startTime = time.perf_counter()
+    records = None
+    if recordFile is not None:
+        records = open(recordFile, 'a')
+    pool = None
+    if any(name.partition(':')[0] == 'parallel' for name in (engineA, engineB)):
+        parallelProcesses = processes
+        gameResults = map(play_game_job, jobs)
+    else:
+        pool = multiprocessing.Pool(processes)
+        gameResults = pool.imap(play_game_job, jobs)
+    try:
+        for i, game in enumerate(gameResults):
+            if records is not None:
+                records.write(game['record'] + '\n')
+            totalMoves += game['moves']
+            totalSeconds += game['seconds']
+            seatA = i % 2  # the player number engineA had
+            if game['winner'] == 'draw':
+                results['draws'] += 1
+            elif game['winner'] == seatA:
+                results['wins'] += 1
+            else:
+                results['losses'] += 1
+    finally:
+        if pool is not None:
+            pool.terminate()
+    if records is not None:
+        records.close()
+    results['averageGameLength'] = totalMoves / games if games else 0.0
+    # moves per second of engine time, and of wall time across the pool
+    results['movesPerSecond'] = totalMoves / totalSeconds if totalSeconds else 0.0
+    wallSeconds = time.perf_counter() - startTime
+    results['wallSeconds'] = wallSeconds
+    results['wallMovesPerSecond'] = totalMoves / wallSeconds if wallSeconds else 0.0
+    return results
+
+
+def main():
+    '''main()
+    runs a tournament from the command line and prints the results as JSON'''
+    parser = argparse.ArgumentParser(description='Play Reversi engines against each other.')
+    parser.add_argument('engineA', help='random, greedy, minimax:k, alphabeta:k, '
+                        'parallel:k, pattern:k, numpy:k or time:s')
+    parser.add_argument('engineB', help='the opposing engine')
+    parser.add_argument('--games', type=int, default=100, help='number of games to play')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the first game')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='worker processes (default: one per CPU)')
+    parser.add_argument('--records', help='file to append the game records to')
+    args = parser.parse_args()
+    results = run_tournament(args.engineA, args.engineB, args.games,
+                             args.seed, args.processes, args.records)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()